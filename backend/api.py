@@ -1,84 +1,229 @@
 import os
-import joblib
-from fastapi import FastAPI, Depends, HTTPException, BackgroundTasks
+import time
+from typing import Optional
+import asyncio
+import tempfile
+from fastapi import FastAPI, Depends, HTTPException, BackgroundTasks, Request, Query
+from fastapi.concurrency import run_in_threadpool, iterate_in_threadpool
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from sqlalchemy.orm import Session
-import pandas as pd
-from .database import SessionLocal, engine, Base
-from . import models, schemas
-Base.metadata.create_all(bind=engine)
+from .database import SessionLocal, AsyncSessionLocal, async_engine, engine
+from .migrations import upgrade
+from . import schemas, metrics
+from .metrics import timed, count_queries, instrument_engine, request_seconds, request_db_queries, rows_processed
+from .registry import registry
+from .scoring import score
+from .batching import batcher, MICROBATCH_ENABLED
+from .cache import prediction_cache, SKIP_PERSIST_ON_HIT
+from .ingest import upsert_students
+from .events import label_events
+from .importer import import_file, iter_chunks, DEFAULT_CHUNK_SIZE
+from .bulk_predict import BULK_PREDICT_CHUNK_SIZE, MEDIA_TYPES, ResultEncoder, detect_format, iter_ndjson, score_chunk
+from .predictions import persist_predictions, prediction_writer, query_latest_predictions, PERSIST_MODE
+upgrade(engine)
+instrument_engine(engine)
+if async_engine is not None:
+    instrument_engine(async_engine.sync_engine)
+registry.add_listener(prediction_cache.on_model_change)
 app = FastAPI(title="Live Ingestion + Model API")
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+@app.middleware("http")
+async def observe_requests(request: Request, call_next):
+    t0 = time.perf_counter()
+    with count_queries() as queries:
+        response = await call_next(request)
+    route = request.scope.get("route")
+    path = route.path if route is not None else "unmatched"
+    request_seconds.observe(time.perf_counter() - t0, method=request.method, path=path)
+    request_db_queries.observe(queries[0], method=request.method, path=path)
+    return response
+if AsyncSessionLocal is not None:
+    async def get_db():
+        async with AsyncSessionLocal() as db:
+            yield db
+else:
+    def get_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+async def run_db(db, fn, *args):
+    # run a sync-Session callable on either session flavour without blocking the event loop
+    if AsyncSessionLocal is not None:
+        return await db.run_sync(fn, *args)
+    return await run_in_threadpool(fn, db, *args)
+def _commit(db):
+    db.commit()
 @app.get("/health")
 def health():
     return {"status":"ok"}
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics_endpoint():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
 @app.post("/ingest/students", response_model=dict)
-def ingest_students(payload: schemas.StudentBatch, db: Session = Depends(get_db)):
-    inserted = 0
-    for s in payload.students:
-        if s.student_id is not None:
-            existing = db.query(models.Student).filter(models.Student.student_id == s.student_id).first()
-        else:
-            existing = None
-        if existing:
-            for k, v in s.dict().items():
-                if v is not None and k != "student_id":
-                    setattr(existing, k, v)
-            db.add(existing)
-        else:
-            new = models.Student(**s.dict())
-            db.add(new)
-        inserted += 1
-    db.commit()
-    return {"ingested": inserted}
+async def ingest_students(payload: schemas.StudentBatch, db: Session = Depends(get_db)):
+    records = [s.dict() for s in payload.students]
+    with timed("ingest_upsert"):
+        counts = await run_db(db, upsert_students, records)
+    with timed("ingest_commit"):
+        await run_db(db, _commit)
+    prediction_cache.invalidate_students({s.student_id for s in payload.students if s.student_id is not None})
+    label_events.publish(counts["labels_changed"])
+    rows_processed.inc(len(payload.students), op="ingest")
+    return {"ingested": len(payload.students), **counts}
+@app.post("/ingest/file", response_model=dict)
+async def ingest_file(request: Request, fmt: str = Query("csv", alias="format"), chunksize: int = DEFAULT_CHUNK_SIZE):
+    # spool the upload to disk so neither the body nor the parsed file is held in memory
+    if fmt not in ("csv", "parquet", "arrow"):
+        raise HTTPException(status_code=400, detail="format must be 'csv', 'parquet' or 'arrow'")
+    tmp = tempfile.NamedTemporaryFile(suffix="." + fmt, delete=False)
+    try:
+        with tmp:
+            async for block in request.stream():
+                tmp.write(block)
+        return await run_in_threadpool(import_file, tmp.name, chunksize, fmt)
+    except (RuntimeError, ValueError) as e:
+        # missing pyarrow, or a malformed upload: pandas' ParserError/EmptyDataError, pyarrow's ArrowInvalid and
+        # UnicodeDecodeError are all ValueErrors
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        os.remove(tmp.name)
 from .train_model import train_and_save_model
+from .jobs import training_executor, job_status
 @app.post("/train", response_model=dict)
 def train_endpoint(req: schemas.TrainRequest = None, background_tasks: BackgroundTasks = None, db: Session = Depends(get_db)):
-    # run in background if background_tasks provided (FastAPI will supply when invoked via HTTP)
+    # queue on the training process pool when invoked via HTTP (FastAPI supplies background_tasks)
     params = req.dict() if req else {}
     if background_tasks:
-        background_tasks.add_task(train_and_save_model, params)
-        return {"status":"training_started"}
+        job_id, deduplicated = training_executor.submit(params)
+        return {"status":"queued","job_id":job_id,"deduplicated":deduplicated}
     # else run sync
     result = train_and_save_model(params)
     return result
+@app.get("/train/{job_id}", response_model=dict)
+def train_status(job_id: int):
+    status = job_status(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Training job not found")
+    return status
+def _persist(db, rows):
+    persist_predictions(db, rows)
+    db.commit()
 @app.post("/predict", response_model=dict)
-def predict(req: schemas.PredictRequest, db: Session = Depends(get_db)):
-    model_path = os.environ.get("MODEL_PATH", "./models/dropout_model.pkl")
-    if not os.path.exists(model_path):
+async def predict(req: schemas.PredictRequest, db: Session = Depends(get_db)):
+    with timed("predict_model_lookup"):
+        loaded = await run_in_threadpool(registry.get)
+    if loaded is None:
         raise HTTPException(status_code=400, detail="Model artifact not found. Train first.")
-    model, trained_features = joblib.load(model_path)
-    df = pd.DataFrame([s.dict() for s in req.students])
-    X_new = df.copy()
-    X_new = pd.get_dummies(X_new, drop_first=True)
-    for col in trained_features:
-        if col not in X_new.columns:
-            X_new[col] = 0
-    X_new = X_new[trained_features]
-    preds = model.predict(X_new)
-    probs = model.predict_proba(X_new)[:,1] if hasattr(model, "predict_proba") else [None]*len(preds)
-    results = []
-    for i, row in df.iterrows():
-        student_raw_id = row.get("student_id", None)
-        student_row = None
-        if student_raw_id is not None:
-            student_row = db.query(models.Student).filter(models.Student.student_id == student_raw_id).first()
-        pred = models.Prediction(
-            student_id = student_row.id if student_row else None,
-            raw_student_id = student_raw_id,
-            predicted_label = int(preds[i]),
-            probability = float(probs[i]) if probs is not None else None,
-            model_id = None
-        )
-        db.add(pred)
-        results.append({
-            "student_id": student_raw_id,
-            "predicted_label": int(preds[i]),
-            "probability": float(probs[i]) if probs is not None else None
-        })
-    db.commit()
+    students = req.students
+    preds, probs = [None] * len(students), [None] * len(students)
+    model_ids = [loaded.model_id] * len(students)
+    cached = [False] * len(students)
+    if prediction_cache.enabled:
+        for i, s in enumerate(students):
+            hit = prediction_cache.get(loaded.version, s)
+            if hit is not None:
+                preds[i], probs[i] = hit
+                cached[i] = True
+    miss = [i for i in range(len(students)) if not cached[i]]
+    if miss:
+        if MICROBATCH_ENABLED and len(miss) == 1:
+            try:
+                used, pred, prob = await asyncio.wrap_future(batcher.submit(students[miss[0]]))
+            except LookupError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            scored = [pred], [prob]
+        else:
+            used, scored = loaded, await run_in_threadpool(score, loaded, [students[i] for i in miss])
+        for i, p, pr in zip(miss, *scored):
+            preds[i], probs[i], model_ids[i] = p, pr, used.model_id
+            if prediction_cache.enabled:
+                prediction_cache.put(used.version, students[i], p, pr)
+    results = [
+        {"student_id": s.student_id, "predicted_label": int(p), "probability": pr, "model_id": m}
+        for s, p, pr, m in zip(students, preds, probs, model_ids)
+    ]
+    rows = [
+        {"raw_student_id": r["student_id"], "predicted_label": r["predicted_label"], "probability": r["probability"], "model_id": r["model_id"]}
+        for r, hit in zip(results, cached) if not (hit and SKIP_PERSIST_ON_HIT)
+    ]
+    with timed("predict_persist"):
+        if PERSIST_MODE == "background":
+            # never block the event loop on a full queue; drops are counted on /metrics
+            prediction_writer.submit(rows, block=False)
+        else:
+            await run_db(db, _persist, rows)
+    rows_processed.inc(len(rows), op="predict")
     return {"predictions": results}
+@app.get("/predictions/latest", response_model=dict)
+async def latest_predictions(min_probability: Optional[float] = Query(None, ge=0, le=1),
+                             max_probability: Optional[float] = Query(None, ge=0, le=1),
+                             predicted_label: Optional[int] = None, model_id: Optional[int] = None,
+                             order: str = "desc", limit: int = Query(100, ge=1, le=1000),
+                             cursor: Optional[str] = None, db: Session = Depends(get_db)):
+    if order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="order must be 'asc' or 'desc'")
+    try:
+        return await run_db(db, query_latest_predictions, min_probability, max_probability, predicted_label,
+                            model_id, order, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+def _persist_bulk(out):
+    ok = out[out["error"].isna()].drop(columns="error").rename(columns={"student_id": "raw_student_id"})
+    rows = ok.astype(object).where(ok.notna(), None).to_dict("records")
+    if PERSIST_MODE == "background":
+        prediction_writer.submit(rows)
+        return
+    db = SessionLocal()
+    try:
+        _persist(db, rows)
+    finally:
+        db.close()
+@app.post("/predict/bulk")
+async def predict_bulk(request: Request, fmt: Optional[str] = Query(None, alias="format"),
+                       chunksize: int = BULK_PREDICT_CHUNK_SIZE, persist: bool = True):
+    # columnar scoring without per-row pydantic models; results stream back chunk by chunk in the request's format
+    fmt = detect_format(request.headers.get("content-type"), fmt)
+    if fmt is None:
+        raise HTTPException(status_code=415, detail="Send application/x-ndjson, an Arrow IPC stream or Parquet (or ?format=ndjson|arrow|parquet)")
+    loaded = await run_in_threadpool(registry.get)
+    if loaded is None:
+        raise HTTPException(status_code=400, detail="Model artifact not found. Train first.")
+    # the whole body is spooled to disk before the response starts: once it has, Starlette's disconnect
+    # listener competes for receive() and a body still being read would stall; Arrow/Parquet also need seeking
+    tmp = tempfile.NamedTemporaryFile(suffix="." + fmt, delete=False)
+    spool = tmp.name
+    try:
+        with tmp:
+            async for block in request.stream():
+                tmp.write(block)
+        chunks = iterate_in_threadpool(iter_ndjson(spool, chunksize) if fmt == "ndjson" else iter_chunks(spool, chunksize, fmt))
+        try:
+            first = await chunks.__anext__()
+        except StopAsyncIteration:
+            first = None
+        except (RuntimeError, ValueError) as e:
+            raise HTTPException(status_code=400, detail=f"Could not read {fmt} body: {e}")
+    except BaseException:
+        # a client disconnect mid-upload or an unreadable body; once body() starts it owns the spool
+        os.remove(spool)
+        raise
+    encoder = ResultEncoder(fmt)
+    async def emit(chunk):
+        with timed("bulk_predict_chunk"):
+            out = await run_in_threadpool(score_chunk, loaded, chunk)
+        if persist:
+            with timed("predict_persist"):
+                await run_in_threadpool(_persist_bulk, out)
+        rows_processed.inc(len(out), op="predict_bulk")
+        return await run_in_threadpool(encoder.write, out)
+    async def body():
+        try:
+            if first is not None:
+                yield await emit(first)
+                async for chunk in chunks:
+                    yield await emit(chunk)
+            yield encoder.close()
+        finally:
+            os.remove(spool)
+    return StreamingResponse(body(), media_type=MEDIA_TYPES[fmt])
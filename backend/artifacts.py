@@ -0,0 +1,191 @@
+import os
+import hashlib
+import logging
+import tempfile
+from typing import Any, Dict, Optional, Tuple
+import joblib
+import numpy as np
+from scipy.special import expit
+from .database import SessionLocal
+from .features import FeatureEncoder
+from .compiled import CompiledForest, CompiledModel, compile_pipeline
+from . import models
+
+logger = logging.getLogger(__name__)
+
+MODEL_DIR = os.environ.get("MODEL_DIR", "./models")
+VERIFY_CHECKSUM = os.environ.get("ARTIFACT_VERIFY_CHECKSUM", "0") == "1"
+# "compiled": flat linear weights / compiled tree arrays when available; "sklearn": the pickled pipeline as is
+INFERENCE_BACKEND = os.environ.get("INFERENCE_BACKEND", "compiled")
+
+class FlatLinearModel:
+    """Binary logistic model evaluated from one flat `[intercept, coef...]` array.
+
+    Any StandardScaler steps in front of the classifier are folded into the
+    weights, so scoring is a single dot product over the encoded matrix.
+    """
+    classes_ = np.array([0, 1])
+
+    def __init__(self, weights: np.ndarray):
+        self.weights = weights
+
+    def decision_function(self, X):
+        return X @ self.weights[1:] + self.weights[0]
+
+    def predict_proba(self, X):
+        p = expit(self.decision_function(X))
+        return np.column_stack([1.0 - p, p])
+
+    def predict(self, X):
+        return (self.decision_function(X) > 0).astype(np.int64)
+
+def flatten_linear(pipeline) -> Optional[np.ndarray]:
+    """Fold `[StandardScaler...] -> linear classifier` into flat weights, or None if not applicable."""
+    steps = [s for _, s in getattr(pipeline, "steps", [("clf", pipeline)])]
+    clf, pre = steps[-1], steps[:-1]
+    coef = getattr(clf, "coef_", None)
+    if coef is None or coef.shape[0] != 1 or list(getattr(clf, "classes_", [])) != [0, 1]:
+        return None
+    if getattr(clf, "loss", "log_loss") != "log_loss":
+        return None
+    w = coef[0].astype(np.float64)
+    b = float(np.ravel(clf.intercept_)[0])
+    for step in reversed(pre):
+        if type(step).__name__ != "StandardScaler":
+            return None
+        scale = step.scale_ if step.scale_ is not None else np.ones_like(w)
+        mean = step.mean_ if step.mean_ is not None else np.zeros_like(w)
+        w = w / scale
+        b -= float((mean * w).sum())
+    return np.concatenate([[b], w])
+
+def _sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def _save_npy(path: str, arr: np.ndarray):
+    with open(path, "wb") as f:
+        np.save(f, arr)
+
+def _save_npz(path: str, arrays: Dict[str, np.ndarray]):
+    with open(path, "wb") as f:
+        np.savez(f, **arrays)
+
+def _atomic_write(path: str, write):
+    # temp file in the target directory so os.replace is a same-filesystem rename
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    os.close(fd)
+    try:
+        write(tmp)
+        with open(tmp, "rb") as f:
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+def save_artifact(pipeline, encoder: FeatureEncoder, name: str = "dropout-model",
+                  metadata: Dict[str, Any] = None, model_dir: str = None) -> Tuple[int, str]:
+    """Write a new immutable artifact version and register it as a `ModelArtifact` row.
+
+    The row id names the file (`<name>-<id>.joblib`). The id is reserved
+    with an empty path first; the file is written uncompressed to a temp
+    file and renamed into place before the path is committed, so readers
+    never see a partial artifact. Linear models also
+    get a flat `.npy` weight vector that loads memory-mapped without
+    unpickling sklearn, and tree ensembles a compiled `.forest.npz` node
+    array file. The checksum and feature schema go to metadata_json.
+    """
+    model_dir = model_dir or MODEL_DIR
+    os.makedirs(model_dir, exist_ok=True)
+    # reserve the id in its own short transaction: on SQLite an open write transaction would hold the database
+    # lock through the dump, fsync and compilation below. The empty path keeps the row out of latest_artifact().
+    db = SessionLocal()
+    try:
+        m = models.ModelArtifact(name=name, path="")
+        db.add(m)
+        db.commit()
+        artifact_id = m.id
+    finally:
+        db.close()
+    try:
+        path = os.path.join(model_dir, f"{name}-{artifact_id}.joblib")
+        _atomic_write(path, lambda tmp: joblib.dump((pipeline, encoder), tmp))
+        meta = dict(metadata or {}, format="joblib", checksum=_sha256(path), features=encoder.to_dict(),
+                    feature_names=encoder.feature_names)
+        flat = flatten_linear(pipeline)
+        if flat is not None:
+            flat_path = os.path.join(model_dir, f"{name}-{artifact_id}.linear.npy")
+            _atomic_write(flat_path, lambda tmp: _save_npy(tmp, flat))
+            meta["linear"] = {"path": flat_path, "checksum": _sha256(flat_path)}
+        compiled = compile_pipeline(pipeline)
+        if compiled is not None:
+            forest_path = os.path.join(model_dir, f"{name}-{artifact_id}.forest.npz")
+            _atomic_write(forest_path, lambda tmp: _save_npz(tmp, compiled.forest.to_dict()))
+            meta["compiled"] = {"path": forest_path, "checksum": _sha256(forest_path), "kind": compiled.forest.kind,
+                                "preprocessed": compiled.pre is not None}
+    except BaseException:
+        _discard_reservation(artifact_id)
+        raise
+    db = SessionLocal()
+    try:
+        m = db.get(models.ModelArtifact, artifact_id)
+        m.path = path
+        m.metadata_json = meta
+        db.commit()
+    finally:
+        db.close()
+    logger.info("Saved model artifact %s to %s", artifact_id, path)
+    return artifact_id, path
+
+def _discard_reservation(artifact_id: int):
+    db = SessionLocal()
+    try:
+        db.query(models.ModelArtifact).filter(models.ModelArtifact.id == artifact_id,
+                                              models.ModelArtifact.path == "").delete()
+        db.commit()
+    finally:
+        db.close()
+
+def load_artifact(path: str, metadata: Dict[str, Any] = None, backend: str = None):
+    """Load `(model, encoder)` for an artifact.
+
+    With the compiled backend, uses the memory-mapped flat linear weights or
+    the compiled forest arrays when available (tree ensembles without a
+    compiled file are compiled on load); otherwise a memory-mapped joblib
+    load. Legacy `(pipeline, feature_names)` files get an encoder rebuilt
+    from the column names.
+    """
+    metadata = metadata or {}
+    compiled = (backend or INFERENCE_BACKEND) == "compiled"
+    if VERIFY_CHECKSUM and metadata.get("checksum") and _sha256(path) != metadata["checksum"]:
+        raise ValueError(f"Checksum mismatch for model artifact {path}")
+    linear, forest = metadata.get("linear"), metadata.get("compiled")
+    if compiled and linear and "features" in metadata and os.path.exists(linear["path"]):
+        return FlatLinearModel(np.load(linear["path"], mmap_mode="r")), FeatureEncoder.from_dict(metadata["features"])
+    if compiled and forest and not forest.get("preprocessed") and "features" in metadata and os.path.exists(forest["path"]):
+        with np.load(forest["path"]) as arrays:
+            return CompiledModel(None, CompiledForest.from_dict(arrays)), FeatureEncoder.from_dict(metadata["features"])
+    model, encoder = joblib.load(path, mmap_mode="r")
+    if not isinstance(encoder, FeatureEncoder):
+        encoder = FeatureEncoder.from_feature_names(encoder)
+    if compiled and forest and os.path.exists(forest["path"]):
+        with np.load(forest["path"]) as arrays:
+            model = CompiledModel(model[:-1] if forest.get("preprocessed") else None, CompiledForest.from_dict(arrays))
+    elif compiled:
+        model = compile_pipeline(model) or model
+    return model, encoder
+
+def latest_artifact(name: str = None) -> Optional[models.ModelArtifact]:
+    db = SessionLocal()
+    try:
+        q = db.query(models.ModelArtifact).filter(models.ModelArtifact.path != "")
+        if name:
+            q = q.filter(models.ModelArtifact.name == name)
+        return q.order_by(models.ModelArtifact.id.desc()).first()
+    finally:
+        db.close()
@@ -0,0 +1,116 @@
+"""Rescore the `students` table offline with the latest model artifact.
+
+    python -m backend.batch_score [--since 2024-01-01T00:00:00] [--workers 4] [--partition-size 50000] [--model-name NAME]
+
+Students are split into `students.id` key ranges; a process pool scores the
+ranges with the model loaded once per worker, and the parent writes the
+resulting `Prediction` rows in bulk, tagged with the `ModelArtifact` id.
+"""
+import os
+import time
+import logging
+import argparse
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, Optional
+import pandas as pd
+from sqlalchemy import select, insert, func
+from .database import SessionLocal, engine
+from .columnar import iter_student_columns
+from .artifacts import load_artifact, latest_artifact as latest_model_artifact
+from .predictions import upsert_latest_predictions
+from . import models
+
+logger = logging.getLogger(__name__)
+
+SCORE_COLUMNS = [
+    "id", "student_id", "age", "gender", "attendance_percentage", "gpa", "parent_education",
+    "socioeconomic_status", "extracurricular_participation", "previous_failures"
+]
+
+_worker_model = None
+
+def _init_worker(model_path: str, metadata: Optional[dict]):
+    global _worker_model
+    # connections inherited from the parent must not be shared across processes
+    engine.dispose(close=False)
+    _worker_model = load_artifact(model_path, metadata)
+
+def _score_partition(id_range, since: Optional[datetime], batch_size: int):
+    model, encoder = _worker_model
+    out = []
+    for cols in iter_student_columns(SCORE_COLUMNS, id_range=id_range, created_since=since, batch_size=batch_size):
+        X = encoder.transform(cols)
+        preds = model.predict(X).tolist()
+        probs = model.predict_proba(X)[:, 1].tolist() if hasattr(model, "predict_proba") else [None] * len(preds)
+        # a NULL student_id turns the whole float column NaN-bearing; hand back ints and None, never floats
+        sids = [None if v is pd.NA else int(v) for v in pd.array(cols["student_id"], dtype="Int64")]
+        out.append((cols["id"].tolist(), sids, preds, probs))
+    return out
+
+def _partitions(since: Optional[datetime], partition_size: int):
+    table = models.Student.__table__
+    stmt = select(func.min(table.c.id), func.max(table.c.id))
+    if since is not None:
+        stmt = stmt.where(table.c.created_at > since)
+    with engine.connect() as conn:
+        lo, hi = conn.execute(stmt).one()
+    if lo is None:
+        return []
+    return [(start, min(start + partition_size - 1, hi)) for start in range(lo, hi + 1, partition_size)]
+
+def score_students(since: Optional[datetime] = None, workers: int = None, partition_size: int = 50000,
+                   batch_size: int = 10000, model_id: Optional[int] = None, model_path: Optional[str] = None,
+                   model_name: Optional[str] = None) -> Dict[str, Any]:
+    metadata = None
+    if model_path is None:
+        # the same artifact the API's registry serves
+        artifact = latest_model_artifact(model_name or os.environ.get("MODEL_NAME", "dropout-model"))
+        if artifact is not None:
+            model_id, model_path, metadata = artifact.id, artifact.path, artifact.metadata_json
+    if model_path is None or not os.path.exists(model_path):
+        raise FileNotFoundError("Model artifact not found. Train first.")
+    partitions = _partitions(since, partition_size)
+    started = time.perf_counter()
+    stats = {"model_id": model_id, "partitions": len(partitions), "rows": 0}
+    table = models.Prediction.__table__
+    engine.dispose(close=False)
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), initializer=_init_worker, initargs=(model_path, metadata)) as pool:
+        futures = [pool.submit(_score_partition, r, since, batch_size) for r in partitions]
+        for fut in as_completed(futures):
+            rows = [
+                {"student_id": pk, "raw_student_id": sid, "predicted_label": int(p), "probability": pr, "model_id": model_id}
+                for pks, sids, preds, probs in fut.result()
+                for pk, sid, p, pr in zip(pks, sids, preds, probs)
+            ]
+            if rows:
+                db = SessionLocal()
+                try:
+                    db.execute(insert(table), rows)
+                    upsert_latest_predictions(db, rows)
+                    db.commit()
+                finally:
+                    db.close()
+            stats["rows"] += len(rows)
+            logger.info("Scored %d rows (%d/%d partitions)", stats["rows"],
+                        sum(f.done() for f in futures), len(partitions))
+    stats["seconds"] = round(time.perf_counter() - started, 3)
+    stats["rows_per_sec"] = round(stats["rows"] / stats["seconds"], 1) if stats["seconds"] else None
+    return stats
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score every student with the latest model artifact.")
+    parser.add_argument("--since", type=datetime.fromisoformat, default=None,
+                        help="only score students created after this ISO timestamp")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--partition-size", type=int, default=50000)
+    parser.add_argument("--batch-size", type=int, default=10000)
+    parser.add_argument("--model-name", default=None, help="ModelArtifact name (default MODEL_NAME or dropout-model)")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    stats = score_students(args.since, args.workers, args.partition_size, args.batch_size, model_name=args.model_name)
+    logger.info("Batch scoring finished: %s", stats)
+    return stats
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import os
+import time
+import queue
+import logging
+import threading
+from concurrent.futures import Future
+from .registry import registry
+from .scoring import score
+
+logger = logging.getLogger(__name__)
+
+MICROBATCH_ENABLED = os.environ.get("PREDICT_MICROBATCH", "0") == "1"
+
+class MicroBatcher:
+    """Coalesces concurrent single-student /predict calls into one model call.
+
+    Each request thread submits its record and blocks on a Future. A single
+    collector thread takes the first waiting record, keeps gathering until
+    `max_batch_size` records or `max_wait_ms` have passed, scores the batch
+    as one matrix and resolves every Future with its own row, together with
+    the model snapshot that produced it.
+    """
+    def __init__(self, max_batch_size: int = None, max_wait_ms: float = None):
+        self.max_batch_size = max_batch_size or int(os.environ.get("PREDICT_MICROBATCH_MAX_SIZE", "64"))
+        if max_wait_ms is None:
+            max_wait_ms = float(os.environ.get("PREDICT_MICROBATCH_MAX_WAIT_MS", "5"))
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def submit(self, student) -> Future:
+        if self._thread is None:
+            self.start()
+        fut = Future()
+        self._queue.put((student, fut))
+        return fut
+
+    def start(self):
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True, name="predict-microbatcher")
+                self._thread.start()
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            try:
+                loaded = registry.get()
+                if loaded is None:
+                    raise LookupError("Model artifact not found. Train first.")
+                preds, probs = score(loaded, [student for student, _ in batch])
+            except Exception as e:
+                for _, fut in batch:
+                    fut.set_exception(e)
+                continue
+            for (_, fut), p, pr in zip(batch, preds, probs):
+                fut.set_result((loaded, p, pr))
+
+batcher = MicroBatcher()
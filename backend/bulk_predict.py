@@ -0,0 +1,161 @@
+import io
+import os
+import json
+from typing import Iterator, Optional
+import numpy as np
+import pandas as pd
+from .features import NUMERIC_FEATURES, CATEGORICAL_FEATURES
+from .scoring import score_arrays
+
+BULK_PREDICT_CHUNK_SIZE = int(os.environ.get("BULK_PREDICT_CHUNK_SIZE", "10000"))
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+def detect_format(content_type: Optional[str], fmt: Optional[str] = None) -> Optional[str]:
+    if fmt:
+        return fmt if fmt in MEDIA_TYPES else None
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    for name, media in MEDIA_TYPES.items():
+        if content_type == media:
+            return name
+    if content_type in ("application/jsonl", "application/json-lines", "application/jsonlines"):
+        return "ndjson"
+    return None
+
+# per-row parse failures travel with the chunk in this column until validate_chunk turns them into row errors
+PARSE_ERROR = "__parse_error__"
+
+def _parse_ndjson(lines) -> pd.DataFrame:
+    try:
+        return pd.read_json(io.BytesIO(b"\n".join(lines)), lines=True, dtype=False, convert_dates=False)
+    except ValueError:
+        pass
+    # some line is not a JSON object: parse one by one so only that row is rejected
+    records = []
+    for line in lines:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        records.append(record if isinstance(record, dict) else {PARSE_ERROR: "invalid JSON"})
+    return pd.DataFrame.from_records(records)
+
+def iter_ndjson(path: str, chunksize: int) -> Iterator[pd.DataFrame]:
+    """Parse a spooled NDJSON body into DataFrames of at most `chunksize` rows.
+
+    A line that is not a JSON object becomes a row flagged for validate_chunk
+    to reject, so a bad line anywhere in the body costs one row, not the response.
+    """
+    lines = []
+    with open(path, "rb") as f:
+        for line in f:
+            if line.strip():
+                lines.append(line.rstrip(b"\r\n"))
+            if len(lines) >= chunksize:
+                yield _parse_ndjson(lines)
+                lines = []
+    if lines:
+        yield _parse_ndjson(lines)
+
+def validate_chunk(df: pd.DataFrame):
+    """Coerce feature columns in place and return a per-row error array (None where the row is valid).
+
+    Values that are present but not numeric, or non-integral student ids,
+    mark the row invalid; missing values are left for the encoder to fill.
+    """
+    errors = np.full(len(df), "", dtype=object)
+    if PARSE_ERROR in df.columns:
+        bad = df.pop(PARSE_ERROR).notna().to_numpy()
+        errors[bad] += "invalid JSON; "
+    for c in NUMERIC_FEATURES:
+        if c not in df.columns:
+            continue
+        values = pd.to_numeric(df[c], errors="coerce")
+        bad = values.isna() & df[c].notna()
+        if c == "student_id":
+            bad |= values.notna() & (values % 1 != 0)
+        bad = bad.to_numpy()
+        errors[bad] += f"invalid {c}; "
+        df[c] = values
+    for c in CATEGORICAL_FEATURES:
+        if c in df.columns:
+            df[c] = df[c].astype("string").str.strip()
+    return np.where(errors == "", None, np.char.rstrip(errors.astype(str), "; ").astype(object))
+
+def score_chunk(loaded, df: pd.DataFrame) -> pd.DataFrame:
+    """Score one validated chunk; invalid rows come back with a null label and their error."""
+    errors = validate_chunk(df)
+    ok = np.equal(errors, None)
+    labels = np.full(len(df), np.nan)
+    probs = np.full(len(df), np.nan)
+    if ok.any():
+        labels[ok], probs[ok] = score_arrays(loaded, df[ok])
+    sid = df["student_id"].to_numpy(dtype=float) if "student_id" in df.columns else np.full(len(df), np.nan)
+    return _result(np.where(sid % 1 == 0, sid, np.nan), labels, probs, loaded.model_id, errors)
+
+def _result(student_ids, labels, probs, model_id, errors) -> pd.DataFrame:
+    return pd.DataFrame({
+        "student_id": pd.array(student_ids, dtype="Float64").astype("Int64"),
+        "predicted_label": pd.array(labels, dtype="Float64").astype("Int64"),
+        "probability": np.asarray(probs, dtype=np.float64),
+        # the legacy MODEL_PATH model has no ModelArtifact id
+        "model_id": pd.array([model_id] * len(labels), dtype="Int64"),
+        "error": pd.array(errors, dtype="string"),
+    })
+
+class _Sink:
+    """Write-only file object collecting output between flushes of a streaming response."""
+    closed = False
+
+    def __init__(self):
+        self._parts, self._pos = [], 0
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        self._pos += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._pos
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data, self._parts = b"".join(self._parts), []
+        return data
+
+class ResultEncoder:
+    """Incrementally encode result chunks as NDJSON lines, one Arrow IPC stream or one Parquet file."""
+    def __init__(self, fmt: str):
+        self.fmt, self._sink, self._writer = fmt, _Sink(), None
+
+    def write(self, out: pd.DataFrame) -> bytes:
+        if self.fmt == "ndjson":
+            return out.to_json(orient="records", lines=True, double_precision=15).rstrip("\n").encode() + b"\n" if len(out) else b""
+        import pyarrow as pa
+        table = pa.Table.from_pandas(out, preserve_index=False)
+        if self._writer is None:
+            if self.fmt == "arrow":
+                self._writer = pa.ipc.new_stream(self._sink, table.schema)
+            else:
+                import pyarrow.parquet as pq
+                self._writer = pq.ParquetWriter(self._sink, table.schema)
+        self._writer.write_table(table)
+        return self._sink.drain()
+
+    def close(self) -> bytes:
+        head = b""
+        if self._writer is None and self.fmt != "ndjson":
+            # an empty body still has to be a valid stream/file with the result schema
+            head = self.write(_result([], [], [], 0, []))
+        if self._writer is not None:
+            self._writer.close()
+        return head + self._sink.drain()
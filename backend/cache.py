@@ -0,0 +1,101 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+from typing import Iterable, Optional, Tuple
+from .metrics import Counter
+
+CACHE_SIZE = int(os.environ.get("PREDICTION_CACHE_SIZE", "10000"))
+CACHE_TTL_SECONDS = float(os.environ.get("PREDICTION_CACHE_TTL_SECONDS", "600"))
+# don't write another Prediction row for a cache hit
+SKIP_PERSIST_ON_HIT = os.environ.get("PREDICTION_CACHE_SKIP_PERSIST", "0") == "1"
+
+FEATURE_FIELDS = (
+    "student_id", "age", "gender", "attendance_percentage", "gpa", "parent_education",
+    "socioeconomic_status", "extracurricular_participation", "previous_failures"
+)
+
+cache_lookups = Counter("dropout_prediction_cache_total", "Prediction cache lookups by result (hit/miss).", ["result"])
+cache_evictions = Counter("dropout_prediction_cache_evictions_total", "Prediction cache removals by reason.", ["reason"])
+
+class PredictionCache:
+    """Bounded LRU + TTL cache of `(label, probability)` per (model version, student features).
+
+    The key is the registry's `LoadedModel.version` plus the tuple of
+    feature values, so any change in the features or the model is a miss by
+    construction. The version rather than the model id, because the legacy
+    MODEL_PATH model has no id but does change on disk. Entries for a
+    superseded model are dropped when the registry promotes a new one, and
+    `invalidate_students` drops a student's entries when ingest rewrites it.
+    """
+    def __init__(self, max_entries: int = CACHE_SIZE, ttl_seconds: float = CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self._data = OrderedDict()  # (model version, features) -> (expires_at, label, probability)
+        self._by_student = {}       # student_id -> set of keys
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    @staticmethod
+    def _key(version, student) -> Tuple:
+        if isinstance(student, dict):
+            return version, tuple(student.get(f) for f in FEATURE_FIELDS)
+        return version, tuple(getattr(student, f, None) for f in FEATURE_FIELDS)
+
+    def _drop(self, key):
+        self._data.pop(key, None)
+        keys = self._by_student.get(key[1][0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_student[key[1][0]]
+
+    def get(self, version, student) -> Optional[Tuple[int, float]]:
+        key = self._key(version, student)
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                self._drop(key)
+                cache_evictions.inc(reason="expired")
+                entry = None
+            if entry is None:
+                cache_lookups.inc(result="miss")
+                return None
+            self._data.move_to_end(key)
+        cache_lookups.inc(result="hit")
+        return entry[1], entry[2]
+
+    def put(self, version, student, label, probability):
+        key = self._key(version, student)
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, label, probability)
+            self._data.move_to_end(key)
+            self._by_student.setdefault(key[1][0], set()).add(key)
+            while len(self._data) > self.max_entries:
+                self._drop(next(iter(self._data)))
+                cache_evictions.inc(reason="capacity")
+
+    def invalidate_students(self, student_ids: Iterable):
+        with self._lock:
+            for sid in student_ids:
+                for key in list(self._by_student.get(sid, ())):
+                    self._drop(key)
+                    cache_evictions.inc(reason="ingest")
+
+    def on_model_change(self, loaded):
+        with self._lock:
+            stale = [k for k in self._data if k[0] != loaded.version]
+            for key in stale:
+                self._drop(key)
+            if stale:
+                cache_evictions.inc(len(stale), reason="model_change")
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._by_student.clear()
+
+prediction_cache = PredictionCache()
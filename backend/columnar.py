@@ -0,0 +1,58 @@
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+import numpy as np
+from sqlalchemy import select
+from .database import engine as default_engine
+from .ingest import STUDENT_FIELDS
+from . import models
+
+INT_COLUMNS = {"id", "student_id", "age", "extracurricular_participation", "previous_failures", "drop_out"}
+STR_COLUMNS = {"gender", "parent_education", "socioeconomic_status"}
+DEFAULT_COLUMNS = ["id"] + STUDENT_FIELDS
+
+def _to_array(name: str, values) -> np.ndarray:
+    if name in STR_COLUMNS:
+        return np.array(values, dtype=object)
+    arr = np.array(values, dtype=np.float64)  # None -> nan
+    if name in INT_COLUMNS and not np.isnan(arr).any():
+        return arr.astype(np.int64)
+    return arr
+
+def iter_student_columns(columns: List[str] = None, labelled_only: bool = False, since_id: Optional[int] = None,
+                         id_range: Optional[Tuple[int, int]] = None, created_since: Optional[datetime] = None,
+                         batch_size: int = 50000,
+                         engine=None) -> Iterator[Dict[str, np.ndarray]]:
+    """Stream `students` through Core in id order as batches of typed column arrays.
+
+    Only the requested columns are selected and the result is read with a
+    server-side cursor where the driver supports one; each batch of DBAPI
+    tuples is transposed straight into one NumPy array per column, without
+    ORM instances or per-row dicts. `id_range` is inclusive on both ends.
+    """
+    columns = columns or DEFAULT_COLUMNS
+    table = models.Student.__table__
+    stmt = select(*[table.c[c] for c in columns]).order_by(table.c.id)
+    if labelled_only:
+        stmt = stmt.where(table.c.drop_out.isnot(None))
+    if since_id is not None:
+        stmt = stmt.where(table.c.id > since_id)
+    if id_range is not None:
+        stmt = stmt.where(table.c.id.between(*id_range))
+    if created_since is not None:
+        stmt = stmt.where(table.c.created_at > created_since)
+    with (engine or default_engine).connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=batch_size).execute(stmt)
+        for part in result.partitions(batch_size):
+            yield {c: _to_array(c, vals) for c, vals in zip(columns, zip(*part))}
+
+def load_student_columns(columns: List[str] = None, **kwargs) -> Dict[str, np.ndarray]:
+    columns = columns or DEFAULT_COLUMNS
+    batches = list(iter_student_columns(columns, **kwargs))
+    if not batches:
+        return {c: _to_array(c, []) for c in columns}
+    return {c: np.concatenate([b[c] for b in batches]) for c in columns}
+
+def to_arrow(columns: Dict[str, np.ndarray]):
+    """Wrap column arrays in a pyarrow Table (requires pyarrow)."""
+    import pyarrow as pa
+    return pa.table({c: pa.array(v, from_pandas=True) for c, v in columns.items()})
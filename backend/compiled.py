@@ -0,0 +1,120 @@
+import numpy as np
+from scipy.special import expit
+
+class CompiledForest:
+    """Tree ensemble flattened into contiguous node arrays.
+
+    All trees share one set of arrays (`feature`, `threshold`, `left`,
+    `right`, `value`) indexed by global node id; `roots` holds each tree's
+    first node and leaves have `left == -1`. Evaluation walks every
+    (sample, tree) pair one level per step with fancy indexing, so a batch
+    costs `max_depth` vectorized steps instead of one Python call per tree.
+
+    `kind="mean_proba"` averages per-tree class distributions (random
+    forests); `kind="gb_binary"` sums scaled leaf values onto a baseline
+    log-odds (binary gradient boosting).
+    """
+    ARRAYS = ("feature", "threshold", "left", "right", "value", "roots")
+
+    def __init__(self, feature, threshold, left, right, value, roots, max_depth, kind="mean_proba",
+                 classes=(0, 1), scale=1.0, baseline=0.0):
+        self.feature, self.threshold, self.left, self.right = feature, threshold, left, right
+        self.value, self.roots = value, roots
+        self.max_depth, self.kind = int(max_depth), kind
+        self.classes_ = np.asarray(classes)
+        self.scale, self.baseline = float(scale), float(baseline)
+
+    def to_dict(self):
+        d = {k: getattr(self, k) for k in self.ARRAYS}
+        d["meta"] = np.array([self.max_depth, self.scale, self.baseline])
+        d["classes"] = self.classes_
+        d["kind"] = np.array(self.kind)
+        return d
+
+    @classmethod
+    def from_dict(cls, d):
+        max_depth, scale, baseline = d["meta"]
+        return cls(*(d[k] for k in cls.ARRAYS), max_depth=max_depth, kind=str(d["kind"]),
+                   classes=d["classes"], scale=scale, baseline=baseline)
+
+    def leaves(self, X) -> np.ndarray:
+        # sklearn compares float32 features against float64 thresholds; do the same to match it exactly
+        X = np.asarray(X, dtype=np.float32)
+        rows = np.arange(X.shape[0])[:, None]
+        idx = np.broadcast_to(self.roots, (X.shape[0], self.roots.shape[0])).copy()
+        for _ in range(self.max_depth):
+            internal = self.left[idx] >= 0
+            if not internal.any():
+                break
+            go_left = X[rows, self.feature[idx]] <= self.threshold[idx]
+            idx = np.where(internal, np.where(go_left, self.left[idx], self.right[idx]), idx)
+        return idx
+
+    def predict_proba(self, X):
+        idx = self.leaves(X)
+        if self.kind == "gb_binary":
+            p = expit(self.baseline + self.scale * self.value[idx, 0].sum(axis=1))
+            return np.column_stack([1.0 - p, p])
+        return self.value[idx].mean(axis=1)
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+class CompiledModel:
+    """sklearn preprocessing steps (if any) in front of a compiled forest."""
+    def __init__(self, pre, forest: CompiledForest):
+        self.pre, self.forest = pre, forest
+        self.classes_ = forest.classes_
+
+    def _x(self, X):
+        return self.pre.transform(X) if self.pre is not None else X
+
+    def predict_proba(self, X):
+        return self.forest.predict_proba(self._x(X))
+
+    def predict(self, X):
+        return self.forest.predict(self._x(X))
+
+def _flatten_trees(trees, normalize):
+    feature, threshold, left, right, value, roots = [], [], [], [], [], []
+    offset, max_depth = 0, 0
+    for tree in trees:
+        t = tree.tree_
+        roots.append(offset)
+        leaf = t.children_left < 0
+        feature.append(np.where(leaf, 0, t.feature))
+        threshold.append(t.threshold)
+        left.append(np.where(leaf, -1, t.children_left + offset))
+        right.append(np.where(leaf, -1, t.children_right + offset))
+        v = t.value[:, 0, :].astype(np.float64)
+        if normalize:
+            v = v / v.sum(axis=1, keepdims=True)
+        value.append(v)
+        offset += t.node_count
+        max_depth = max(max_depth, t.max_depth)
+    return dict(feature=np.concatenate(feature).astype(np.intp), threshold=np.concatenate(threshold),
+                left=np.concatenate(left).astype(np.intp), right=np.concatenate(right).astype(np.intp),
+                value=np.concatenate(value), roots=np.asarray(roots, dtype=np.intp), max_depth=max_depth)
+
+def compile_forest(clf):
+    """Compile a fitted RandomForest/ExtraTrees/binary GradientBoosting classifier, or return None."""
+    name = type(clf).__name__
+    if name in ("RandomForestClassifier", "ExtraTreesClassifier") and getattr(clf, "n_outputs_", 1) == 1:
+        return CompiledForest(**_flatten_trees(clf.estimators_, normalize=True), classes=clf.classes_)
+    if name == "GradientBoostingClassifier" and len(clf.classes_) == 2 and clf.loss == "log_loss":
+        flat = _flatten_trees(clf.estimators_[:, 0], normalize=False)
+        # the init estimator's log-odds, recovered through the public API from a single row
+        zero = np.zeros((1, clf.n_features_in_))
+        tree_sum = sum(t.predict(zero.astype(np.float32))[0] for t in clf.estimators_[:, 0])
+        baseline = clf.decision_function(zero)[0] - clf.learning_rate * tree_sum
+        return CompiledForest(**flat, kind="gb_binary", classes=clf.classes_, scale=clf.learning_rate, baseline=baseline)
+    return None
+
+def compile_pipeline(pipeline):
+    """`CompiledModel` for a (pipeline ending in a) supported tree ensemble, else None."""
+    steps = getattr(pipeline, "steps", None)
+    clf = steps[-1][1] if steps else pipeline
+    forest = compile_forest(clf)
+    if forest is None:
+        return None
+    return CompiledModel(pipeline[:-1] if steps and len(steps) > 1 else None, forest)
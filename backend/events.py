@@ -0,0 +1,78 @@
+import os
+import threading
+from typing import Callable, List, Optional
+
+class LabelRelay:
+    """Append-only file carrying label counts from API worker processes to the trainer process.
+
+    Workers append one line per publish (small O_APPEND writes don't
+    interleave); the trainer remembers how far it has read and sums the
+    complete lines written since. Counts are a few bytes per ingest call,
+    and `serve_multiprocess` starts each run with a fresh file.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._offset = 0
+
+    def send(self, n: int):
+        with open(self.path, "a") as f:
+            f.write(f"{n}\n")
+
+    def receive(self) -> int:
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(self._offset)
+                data = f.read()
+        except FileNotFoundError:
+            return 0
+        # a line still being written is left for the next call
+        complete = data[:data.rfind(b"\n") + 1]
+        self._offset += len(complete)
+        return sum(int(line) for line in complete.split())
+
+class LabelEvents:
+    """Tally of labelled rows committed by ingest since the last training trigger.
+
+    Publishers call `publish(n)` after their commit; subscribers are called
+    synchronously with the running total, so they must only schedule work.
+    With a `relay` (LABEL_EVENTS_PATH, set for multi-worker API processes)
+    counts are forwarded to the trainer process instead, which feeds them
+    back in with `publish` after `LabelRelay.receive`.
+    """
+    def __init__(self, relay: Optional[LabelRelay] = None):
+        self.relay = relay
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._listeners: List[Callable[[int], None]] = []
+
+    def subscribe(self, fn: Callable[[int], None]):
+        self._listeners.append(fn)
+
+    def unsubscribe(self, fn: Callable[[int], None]):
+        if fn in self._listeners:
+            self._listeners.remove(fn)
+
+    def publish(self, n: int):
+        if n <= 0:
+            return
+        if self.relay is not None:
+            self.relay.send(n)
+            return
+        with self._lock:
+            self._pending += n
+            total = self._pending
+        for fn in list(self._listeners):
+            fn(total)
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def take(self) -> int:
+        """Return and reset the pending count."""
+        with self._lock:
+            n, self._pending = self._pending, 0
+        return n
+
+_relay_path = os.environ.get("LABEL_EVENTS_PATH")
+label_events = LabelEvents(LabelRelay(_relay_path) if _relay_path else None)
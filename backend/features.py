@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+
+NUMERIC_FEATURES = [
+    "student_id", "age", "attendance_percentage", "gpa",
+    "extracurricular_participation", "previous_failures"
+]
+CATEGORICAL_FEATURES = ["gender", "parent_education", "socioeconomic_status"]
+
+def _columns(data, names):
+    """Column view over a DataFrame, a mapping of column -> values, or a list of records."""
+    if isinstance(data, pd.DataFrame):
+        return {c: (data[c].to_numpy() if c in data.columns else np.full(len(data), None)) for c in names}
+    if isinstance(data, dict):
+        n = len(next(iter(data.values()))) if data else 0
+        return {c: (data[c] if c in data else np.full(n, None)) for c in names}
+    records = list(data)
+    if records and isinstance(records[0], dict):
+        return {c: [r.get(c) for r in records] for c in names}
+    return {c: [getattr(r, c, None) for r in records] for c in names}
+
+class FeatureEncoder:
+    """Fitted, picklable replacement for `pd.get_dummies(drop_first=True)`.
+
+    Each categorical column gets a vocabulary fixed at fit time; the first
+    (sorted) level is the reference and is dropped, exactly as get_dummies
+    does on the training frame. Unknown or missing categories encode as all
+    zeros, and missing numerics are filled with the training median, so a
+    single-row batch always yields the training column layout.
+    """
+    def __init__(self, numeric=None, categorical=None):
+        self.numeric = list(numeric if numeric is not None else NUMERIC_FEATURES)
+        self.categorical = list(categorical if categorical is not None else CATEGORICAL_FEATURES)
+        self.vocab = {c: [] for c in self.categorical}
+        self.fill = {c: 0.0 for c in self.numeric}
+
+    @classmethod
+    def from_feature_names(cls, feature_names):
+        """Rebuild an encoder from a legacy `trained_features` column list."""
+        enc = cls(numeric=[], categorical=[])
+        for name in feature_names:
+            col = next((c for c in CATEGORICAL_FEATURES if name.startswith(c + "_")), None)
+            if col is None:
+                enc.numeric.append(name)
+                enc.fill[name] = 0.0
+            else:
+                if col not in enc.vocab:
+                    enc.categorical.append(col)
+                    enc.vocab[col] = []
+                enc.vocab[col].append(name[len(col) + 1:])
+        return enc
+
+    def to_dict(self):
+        return {"numeric": self.numeric, "categorical": self.categorical, "vocab": self.vocab, "fill": self.fill}
+
+    @classmethod
+    def from_dict(cls, d):
+        enc = cls(numeric=d["numeric"], categorical=d["categorical"])
+        enc.vocab = {c: list(v) for c, v in d["vocab"].items()}
+        enc.fill = {c: float(v) for c, v in d["fill"].items()}
+        return enc
+
+    @property
+    def feature_names(self):
+        return self.numeric + [f"{c}_{v}" for c in self.categorical for v in self.vocab[c]]
+
+    def fit(self, data):
+        cols = _columns(data, self.numeric + self.categorical)
+        for c in self.numeric:
+            arr = pd.to_numeric(pd.Series(cols[c]), errors="coerce").to_numpy(dtype=float)
+            self.fill[c] = float(np.nanmedian(arr)) if np.isfinite(arr).any() else 0.0
+        for c in self.categorical:
+            levels = sorted(pd.Series(cols[c]).dropna().astype(str).unique())
+            self.vocab[c] = levels[1:]
+        return self
+
+    def transform(self, data) -> np.ndarray:
+        cols = _columns(data, self.numeric + self.categorical)
+        n = len(cols[self.numeric[0] if self.numeric else self.categorical[0]]) if cols else 0
+        X = np.zeros((n, len(self.feature_names)), dtype=np.float64)
+        for j, c in enumerate(self.numeric):
+            arr = pd.to_numeric(pd.Series(cols[c]), errors="coerce").to_numpy(dtype=float)
+            X[:, j] = np.where(np.isnan(arr), self.fill[c], arr)
+        offset = len(self.numeric)
+        for c in self.categorical:
+            levels = self.vocab[c]
+            codes = pd.Categorical(pd.Series(cols[c], dtype=object), categories=levels).codes
+            rows = np.nonzero(codes >= 0)[0]
+            X[rows, offset + codes[rows]] = 1.0
+            offset += len(levels)
+        return X
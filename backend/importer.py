@@ -0,0 +1,137 @@
+import os
+import json
+import logging
+from typing import Any, Dict, Iterator, Optional
+import pandas as pd
+from .database import SessionLocal
+from .ingest import STUDENT_FIELDS, upsert_students
+from .metrics import timed, rows_processed
+from .cache import prediction_cache
+from .events import label_events
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = int(os.environ.get("BULK_CHUNK_SIZE", "50000"))
+INT_COLUMNS = ["student_id", "age", "extracurricular_participation", "previous_failures", "drop_out"]
+FLOAT_COLUMNS = ["attendance_percentage", "gpa"]
+STR_COLUMNS = ["gender", "parent_education", "socioeconomic_status"]
+
+def detect_format(path: str) -> str:
+    lower = path.lower()
+    if lower.endswith((".parquet", ".pq")):
+        return "parquet"
+    if lower.endswith((".arrow", ".arrows", ".ipc")):
+        return "arrow"
+    return "csv"
+
+def _arrow_batches(path: str, fmt: str, chunksize: int):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError(f"{fmt.capitalize()} import requires pyarrow to be installed")
+    if fmt == "parquet":
+        yield from pq.ParquetFile(path).iter_batches(batch_size=chunksize)
+        return
+    # Arrow IPC stream format, read zero-copy from a memory map and re-sliced to `chunksize`
+    for batch in pa.ipc.open_stream(pa.memory_map(path)):
+        for start in range(0, batch.num_rows, chunksize):
+            yield batch.slice(start, chunksize)
+
+def iter_chunks(path: str, chunksize: int = DEFAULT_CHUNK_SIZE, fmt: str = None, skip_rows: int = 0) -> Iterator[pd.DataFrame]:
+    """Yield DataFrames of at most `chunksize` rows, starting after `skip_rows` data rows."""
+    fmt = fmt or detect_format(path)
+    if fmt == "csv":
+        skip = range(1, skip_rows + 1) if skip_rows else None
+        yield from pd.read_csv(path, chunksize=chunksize, skiprows=skip)
+    elif fmt in ("parquet", "arrow"):
+        seen = 0
+        for batch in _arrow_batches(path, fmt, chunksize):
+            start, seen = seen, seen + batch.num_rows
+            if seen <= skip_rows:
+                continue
+            if start < skip_rows:
+                batch = batch.slice(skip_rows - start)
+            yield batch.to_pandas()
+    else:
+        raise ValueError(f"Unsupported import format: {fmt}")
+
+def normalize_chunk(df: pd.DataFrame) -> list:
+    """Coerce the known student columns column-wise and return plain-Python records."""
+    df = df[[c for c in STUDENT_FIELDS if c in df.columns]].copy()
+    for c in INT_COLUMNS:
+        if c in df.columns:
+            df[c] = pd.to_numeric(df[c], errors="coerce").round().astype("Int64")
+    for c in FLOAT_COLUMNS:
+        if c in df.columns:
+            df[c] = pd.to_numeric(df[c], errors="coerce").astype("float64")
+    for c in STR_COLUMNS:
+        if c in df.columns:
+            df[c] = df[c].astype("string").str.strip()
+    return df.astype(object).where(df.notna(), None).to_dict("records")
+
+def _file_identity(path: str) -> Dict[str, Any]:
+    # a file replaced or rewritten under the same name must not resume at the old offset
+    st = os.stat(path)
+    return {"path": os.path.abspath(path), "size": st.st_size, "mtime": st.st_mtime}
+
+def _read_checkpoint(checkpoint_path: Optional[str], path: str) -> int:
+    if not checkpoint_path or not os.path.exists(checkpoint_path):
+        return 0
+    with open(checkpoint_path) as f:
+        state = json.load(f)
+    if any(state.get(k) != v for k, v in _file_identity(path).items()):
+        logger.warning("Ignoring checkpoint %s: it was written for a different file", checkpoint_path)
+        return 0
+    return int(state.get("offset", 0))
+
+def _write_checkpoint(checkpoint_path: Optional[str], path: str, offset: int):
+    if not checkpoint_path:
+        return
+    tmp = checkpoint_path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(dict(_file_identity(path), offset=offset), f)
+    os.replace(tmp, checkpoint_path)
+
+def import_file(path: str, chunksize: int = DEFAULT_CHUNK_SIZE, fmt: str = None,
+                checkpoint_path: Optional[str] = None) -> Dict[str, Any]:
+    """Stream a CSV/Parquet student export into the DB, committing per chunk.
+
+    With a `checkpoint_path`, the offset of the last committed row is saved
+    after every chunk and a rerun resumes from there, provided the file's
+    size and mtime still match; the checkpoint is removed once the whole file has been loaded. A failing chunk is rolled
+    back on its own and the error re-raised with earlier chunks kept.
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(path)
+    offset = _read_checkpoint(checkpoint_path, path)
+    if offset:
+        logger.info("Resuming import of %s at row %d", path, offset)
+    stats = {"rows": 0, "inserted": 0, "updated": 0, "chunks": 0, "start_offset": offset}
+    db = SessionLocal()
+    try:
+        for chunk in iter_chunks(path, chunksize, fmt, skip_rows=offset):
+            try:
+                with timed("import_chunk"):
+                    records = normalize_chunk(chunk)
+                    counts = upsert_students(db, records, skip_nulls=False)
+                    db.commit()
+                prediction_cache.invalidate_students(r["student_id"] for r in records if r.get("student_id") is not None)
+                label_events.publish(counts["labels_changed"])
+            except Exception:
+                db.rollback()
+                logger.exception("Import of %s failed in chunk starting at row %d", path, offset)
+                raise
+            offset += len(chunk)
+            _write_checkpoint(checkpoint_path, path, offset)
+            stats["rows"] += len(chunk)
+            stats["inserted"] += counts["inserted"]
+            stats["updated"] += counts["updated"]
+            stats["chunks"] += 1
+            rows_processed.inc(len(chunk), op="import")
+            logger.info("Imported %d rows from %s (offset %d)", stats["rows"], path, offset)
+    finally:
+        db.close()
+    if checkpoint_path and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    return stats
@@ -0,0 +1,86 @@
+from typing import Any, Dict, Iterable
+from sqlalchemy import select, insert, bindparam, func
+from sqlalchemy.orm import Session
+from . import models
+
+STUDENT_FIELDS = [
+    "student_id", "age", "gender", "attendance_percentage", "gpa",
+    "parent_education", "socioeconomic_status", "extracurricular_participation",
+    "previous_failures", "drop_out"
+]
+# stay well below SQLite's bound-parameter limit for IN (...) lists
+IN_CHUNK = 500
+
+def existing_labels(db: Session, student_ids) -> Dict[Any, Any]:
+    """`{student_id: drop_out}` for the ids that already exist, fetched with chunked IN queries."""
+    student_ids = list(student_ids)
+    found = {}
+    for i in range(0, len(student_ids), IN_CHUNK):
+        chunk = student_ids[i:i + IN_CHUNK]
+        found.update(db.execute(select(models.Student.student_id, models.Student.drop_out)
+                                .where(models.Student.student_id.in_(chunk))).all())
+    return found
+
+def _dialect_insert(dialect: str):
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        return None
+    return dialect_insert
+
+def upsert_students(db: Session, records: Iterable[Dict[str, Any]], skip_nulls: bool = True) -> Dict[str, int]:
+    """Set-based insert-or-update of student rows keyed on `student_id`.
+
+    Existing ids for the whole batch are fetched in one pass, then the rows
+    go out as a single executemany: `INSERT ... ON CONFLICT DO UPDATE` on
+    SQLite/Postgres, plain core INSERT + UPDATE elsewhere. With `skip_nulls`
+    a None in the batch leaves the stored value untouched. The caller commits.
+
+    `labels_changed` counts rows that now carry a label they did not have
+    before (new labelled rows, or a different `drop_out`), so re-sending
+    unchanged labels does not look like new training data.
+    """
+    keyed, anonymous, present = {}, [], set()
+    for r in records:
+        present.update(r.keys())
+        row = {k: r.get(k) for k in STUDENT_FIELDS}
+        sid = row["student_id"]
+        if sid is None:
+            anonymous.append(row)
+        elif skip_nulls and sid in keyed:
+            keyed[sid].update({k: v for k, v in row.items() if v is not None})
+        else:
+            keyed[sid] = row
+    existing = existing_labels(db, keyed)
+    rows = list(keyed.values())
+    labels_changed = sum(1 for r in rows if r["drop_out"] is not None
+                         and (r["student_id"] not in existing or existing[r["student_id"]] != r["drop_out"]))
+    labels_changed += sum(1 for r in anonymous if r["drop_out"] is not None)
+    table = models.Student.__table__
+    updatable = [c for c in STUDENT_FIELDS if c != "student_id" and c in present]
+    dialect_insert = _dialect_insert(db.get_bind().dialect.name)
+    if rows and dialect_insert is not None and updatable:
+        stmt = dialect_insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.student_id],
+            set_={c: (func.coalesce(stmt.excluded[c], table.c[c]) if skip_nulls else stmt.excluded[c]) for c in updatable}
+        )
+        db.execute(stmt, rows)
+    elif rows:
+        new = [r for r in rows if r["student_id"] not in existing]
+        if new:
+            db.execute(insert(table), new)
+        changed = [{"b_" + k: v for k, v in r.items()} for r in rows if r["student_id"] in existing]
+        if changed and updatable:
+            db.execute(
+                table.update()
+                .where(table.c.student_id == bindparam("b_student_id"))
+                .values({c: (func.coalesce(bindparam("b_" + c), table.c[c]) if skip_nulls else bindparam("b_" + c)) for c in updatable}),
+                changed
+            )
+    if anonymous:
+        db.execute(insert(table), anonymous)
+    updated = len(existing)
+    return {"inserted": len(rows) - updated + len(anonymous), "updated": updated, "labels_changed": labels_changed}
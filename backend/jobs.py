@@ -0,0 +1,153 @@
+import os
+import logging
+import threading
+import multiprocessing
+from datetime import datetime, timezone
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Optional, Tuple
+from .database import SessionLocal
+from . import models
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process training lock
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+TRAIN_MAX_WORKERS = int(os.environ.get("TRAIN_MAX_WORKERS", "1"))
+ACTIVE_STATUSES = ("queued", "running")
+
+def _set_status(run_id: int, status: str, **fields):
+    db = SessionLocal()
+    try:
+        run = db.get(models.TrainingRun, run_id)
+        if run is None:
+            return
+        run.metrics = dict(run.metrics or {}, status=status, **fields)
+        if status == "running":
+            run.started_at = datetime.now(timezone.utc)
+        elif status not in ACTIVE_STATUSES and run.finished_at is None:
+            run.finished_at = datetime.now(timezone.utc)
+        db.commit()
+    finally:
+        db.close()
+
+def run_training_job(run_id: int, params: Dict[str, Any]) -> Dict[str, Any]:
+    """Body of a training job, executed in a pool process.
+
+    A per-model-name file lock serializes training across every process on
+    the host (API workers, auto-trainer), so two jobs never write the same
+    artifact at once; the OS drops the lock if the process dies.
+    """
+    from .train_model import MODEL_DIR, train_and_save_model
+    name = params.get("model_name") or "dropout-model"
+    with open(os.path.join(MODEL_DIR, f".train-{name}.lock"), "w") as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        _set_status(run_id, "running")
+        try:
+            result = train_and_save_model(params, run_id=run_id)
+        except Exception as e:
+            _set_status(run_id, "failed", error=str(e))
+            raise
+    if result.get("status") != "trained":
+        _set_status(run_id, result.get("status", "failed"), **{k: v for k, v in result.items() if k != "status"})
+    return result
+
+def job_status(run_id: int) -> Optional[Dict[str, Any]]:
+    db = SessionLocal()
+    try:
+        run = db.get(models.TrainingRun, run_id)
+        if run is None:
+            return None
+        metrics = dict(run.metrics or {})
+        return {
+            "job_id": run.id,
+            "status": metrics.pop("status", "trained" if run.model_id else "unknown"),
+            "model_id": run.model_id,
+            "params": run.params,
+            "metrics": metrics,
+            "started_at": run.started_at.isoformat() if run.started_at else None,
+            "finished_at": run.finished_at.isoformat() if run.finished_at else None,
+        }
+    finally:
+        db.close()
+
+class TrainingExecutor:
+    """Process-pool training queue using `TrainingRun` rows as job records.
+
+    At most one job per model name runs at a time, and at most one more is
+    queued behind it: further triggers for that name return the queued job's
+    id instead of piling up. sklearn never runs in the submitting process.
+    """
+    def __init__(self, max_workers: int = None):
+        self.max_workers = max_workers or TRAIN_MAX_WORKERS
+        self._pool = None
+        self._lock = threading.Lock()
+        self._running = {}  # model name -> run id
+        self._queued = {}   # model name -> (run id, params)
+
+    def _get_pool(self):
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+
+    def submit(self, params: Dict[str, Any] = None) -> Tuple[int, bool]:
+        """Queue a training job; returns `(job_id, deduplicated)`."""
+        params = dict(params or {})
+        name = params.get("model_name") or "dropout-model"
+        with self._lock:
+            if name in self._queued:
+                return self._queued[name][0], True
+            db = SessionLocal()
+            try:
+                run = models.TrainingRun(params=params, metrics={"status": "queued"})
+                db.add(run)
+                db.commit()
+                run_id = run.id
+            finally:
+                db.close()
+            if name in self._running:
+                self._queued[name] = (run_id, params)
+            else:
+                self._start(name, run_id, params)
+        return run_id, False
+
+    def _start(self, name: str, run_id: int, params: Dict[str, Any]):
+        self._running[name] = run_id
+        fut = self._get_pool().submit(run_training_job, run_id, params)
+        fut.add_done_callback(lambda f: self._finished(name, run_id, f))
+
+    def _finished(self, name: str, run_id: int, fut):
+        exc = fut.exception()
+        if isinstance(exc, BrokenProcessPool):
+            self._pool = None
+        if exc is not None:
+            logger.error("Training job %s failed: %s", run_id, exc)
+            status = job_status(run_id)
+            # the row may be gone (e.g. the tables were recreated under a running job)
+            if status is not None and status["status"] in ACTIVE_STATUSES:
+                _set_status(run_id, "failed", error=str(exc))
+        else:
+            logger.info("Training job %s finished: %s", run_id, fut.result())
+        with self._lock:
+            self._running.pop(name, None)
+            nxt = self._queued.pop(name, None)
+            if nxt is not None:
+                self._start(name, *nxt)
+
+    def shutdown(self, wait: bool = True):
+        pool, self._pool = self._pool, None
+        if pool is None:
+            return
+        workers = list((pool._processes or {}).values())
+        pool.shutdown(wait=wait, cancel_futures=not wait)
+        if not wait:
+            # a pool first used from a daemon thread (an APScheduler job) never gets its stop sentinel to the
+            # workers at interpreter exit, and the process then hangs joining them
+            for p in workers:
+                p.terminate()
+
+training_executor = TrainingExecutor()
@@ -0,0 +1,111 @@
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from sqlalchemy import event
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250, 1000)
+
+_metrics = []
+
+def _label_str(names, values):
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{v}"' for n, v in zip(names, values)) + "}"
+
+class Counter:
+    def __init__(self, name: str, help: str, labels=()):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+        _metrics.append(self)
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(labels.get(n, "") for n in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(tuple(labels.get(n, "") for n in self.labels), 0)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for key, v in sorted(self._values.items()):
+            lines.append(f"{self.name}{_label_str(self.labels, key)} {v}")
+        return lines
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels=(), buckets=LATENCY_BUCKETS):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+        _metrics.append(self)
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels.get(n, "") for n in self.labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            s = self._series.get(key)
+            if s is None:
+                s = self._series[key] = [0] * (len(self.buckets) + 2)
+            if i < len(self.buckets):
+                s[i] += 1
+            s[-2] += value
+            s[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        names = self.labels + ("le",)
+        for key, s in sorted(self._series.items()):
+            cumulative = 0
+            for b, c in zip(self.buckets, s):
+                cumulative += c
+                lines.append(f"{self.name}_bucket{_label_str(names, key + (b,))} {cumulative}")
+            lines.append(f"{self.name}_bucket{_label_str(names, key + ('+Inf',))} {s[-1]}")
+            lines.append(f"{self.name}_sum{_label_str(self.labels, key)} {s[-2]}")
+            lines.append(f"{self.name}_count{_label_str(self.labels, key)} {s[-1]}")
+        return lines
+
+stage_seconds = Histogram("dropout_stage_seconds", "Time spent in each ingest/predict/training stage.", ["stage"])
+request_seconds = Histogram("dropout_http_request_seconds", "HTTP request latency.", ["method", "path"])
+request_db_queries = Histogram("dropout_http_request_db_queries", "DB statements executed per HTTP request.",
+                               ["method", "path"], buckets=COUNT_BUCKETS)
+model_cache = Counter("dropout_model_cache_total", "Model registry lookups by result (hit/miss).", ["result"])
+rows_processed = Counter("dropout_rows_total", "Rows handled per operation.", ["op"])
+
+@contextmanager
+def timed(stage: str):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        stage_seconds.observe(time.perf_counter() - t0, stage=stage)
+
+_query_counter = ContextVar("query_counter", default=None)
+
+@contextmanager
+def count_queries():
+    """Count DB statements executed in this context (propagates into threadpool calls)."""
+    counter = [0]
+    token = _query_counter.set(counter)
+    try:
+        yield counter
+    finally:
+        _query_counter.reset(token)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    counter = _query_counter.get()
+    if counter is not None:
+        counter[0] += 1
+
+def instrument_engine(engine):
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+
+def render() -> str:
+    lines = []
+    for m in _metrics:
+        lines.extend(m.render())
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,86 @@
+"""Versioned schema migrations.
+
+`create_all` only creates missing tables, so changes to existing tables
+(new indexes, columns) are applied here. Each migration runs once, in
+order, and its version is recorded in `schema_migrations`. Migrations
+must be idempotent: a fresh database already gets everything declared on
+the models from `create_all`.
+"""
+import logging
+from datetime import datetime, timezone
+from sqlalchemy import Table, Column, Integer, String, DateTime, MetaData, select, func, insert
+from sqlalchemy.exc import IntegrityError
+from .database import Base, engine as default_engine
+from . import models
+
+logger = logging.getLogger(__name__)
+
+schema_migrations = Table(
+    "schema_migrations", MetaData(),
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime(timezone=True), nullable=False),
+)
+
+def _create_indexes(*names):
+    def apply(conn):
+        for table in (models.Student.__table__, models.TrainingRun.__table__, models.Prediction.__table__):
+            for index in table.indexes:
+                if index.name in names:
+                    index.create(conn, checkfirst=True)
+    return apply
+
+def _backfill_latest_predictions(conn):
+    p, latest = models.Prediction.__table__, models.LatestPrediction.__table__
+    if conn.execute(select(latest.c.raw_student_id).limit(1)).first():
+        return
+    last = (select(func.max(p.c.id).label("id")).where(p.c.raw_student_id.isnot(None))
+            .group_by(p.c.raw_student_id).subquery())
+    cols = ["raw_student_id", "student_id", "predicted_label", "probability", "model_id"]
+    conn.execute(insert(latest).from_select(
+        cols + ["updated_at"], select(*(p.c[c] for c in cols), p.c.created_at).join(last, p.c.id == last.c.id)))
+
+def _steps(*fns):
+    def apply(conn):
+        for fn in fns:
+            fn(conn)
+    return apply
+
+MIGRATIONS = [
+    (1, "autotrainer poll indexes",
+     _create_indexes("ix_students_labelled_id", "ix_students_created_at", "ix_training_runs_finished_at")),
+    (2, "prediction history indexes and latest_predictions backfill",
+     _steps(_create_indexes("ix_predictions_student_id_created_at", "ix_predictions_created_at"),
+            _backfill_latest_predictions)),
+]
+
+def current_version(conn) -> int:
+    schema_migrations.create(conn, checkfirst=True)
+    return max(conn.execute(select(schema_migrations.c.version)).scalars().all(), default=0)
+
+def upgrade(engine=None) -> int:
+    """Create missing tables, then apply pending migrations; returns the schema version."""
+    engine = engine or default_engine
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        version = current_version(conn)
+    for number, name, apply in MIGRATIONS:
+        if number <= version:
+            continue
+        try:
+            with engine.begin() as conn:
+                # another process may have applied it since we looked
+                if conn.execute(select(schema_migrations.c.version).where(schema_migrations.c.version == number)).first():
+                    continue
+                apply(conn)
+                conn.execute(schema_migrations.insert().values(
+                    version=number, name=name, applied_at=datetime.now(timezone.utc)))
+        except IntegrityError:
+            continue
+        logger.info("Applied migration %d: %s", number, name)
+        version = number
+    return version
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    print(f"Schema at version {upgrade()}")
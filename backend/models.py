@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, JSON, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, JSON, ForeignKey, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .database import Base
@@ -17,6 +17,11 @@ class Student(Base):
     previous_failures = Column(Integer, nullable=True)
     drop_out = Column(Integer, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    __table_args__ = (
+        # labelled rows only: the trainer's "new labels since id N" poll is a range count on this index
+        Index("ix_students_labelled_id", id, sqlite_where=drop_out.isnot(None), postgresql_where=drop_out.isnot(None)),
+        Index("ix_students_created_at", created_at),
+    )
 
 class ModelArtifact(Base):
     __tablename__ = "models"
@@ -35,6 +40,7 @@ class TrainingRun(Base):
     started_at = Column(DateTime(timezone=True), server_default=func.now())
     finished_at = Column(DateTime(timezone=True), nullable=True)
     model = relationship("ModelArtifact")
+    __table_args__ = (Index("ix_training_runs_finished_at", finished_at),)
 
 class Prediction(Base):
     __tablename__ = "predictions"
@@ -47,3 +53,31 @@ class Prediction(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     student = relationship("Student")
     model = relationship("ModelArtifact")
+    __table_args__ = (
+        Index("ix_predictions_student_id_created_at", student_id, created_at),
+        Index("ix_predictions_created_at", created_at),
+    )
+
+class LatestPrediction(Base):
+    """Most recent prediction per student, upserted whenever predictions are persisted."""
+    __tablename__ = "latest_predictions"
+    raw_student_id = Column(Integer, primary_key=True)
+    student_id = Column(Integer, ForeignKey("students.id"), nullable=True)
+    predicted_label = Column(Integer, nullable=False)
+    probability = Column(Float, nullable=True)
+    model_id = Column(Integer, ForeignKey("models.id"), nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
+    __table_args__ = (Index("ix_latest_predictions_probability", probability, raw_student_id),)
+
+class PredictionDailyAggregate(Base):
+    """Per-day, per-model rollup of `Prediction` rows removed by the retention job."""
+    __tablename__ = "prediction_daily_aggregates"
+    id = Column(Integer, primary_key=True, index=True)
+    day = Column(Date, nullable=False)
+    model_id = Column(Integer, ForeignKey("models.id"), nullable=True)
+    n = Column(Integer, nullable=False, default=0)
+    positives = Column(Integer, nullable=False, default=0)
+    probability_sum = Column(Float, nullable=True)
+    probability_min = Column(Float, nullable=True)
+    probability_max = Column(Float, nullable=True)
+    __table_args__ = (UniqueConstraint("day", "model_id", name="uq_prediction_daily_aggregates_day_model"),)
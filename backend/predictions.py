@@ -0,0 +1,183 @@
+import os
+import json
+import queue
+import base64
+import atexit
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+from sqlalchemy import select, insert, delete, func, or_, and_
+from sqlalchemy.orm import Session
+from .database import SessionLocal
+from .ingest import IN_CHUNK, _dialect_insert
+from .metrics import Counter
+from . import models
+
+logger = logging.getLogger(__name__)
+
+PERSIST_MODE = os.environ.get("PREDICTION_PERSIST_MODE", "sync")
+
+dropped_predictions = Counter("dropout_predictions_dropped_total",
+                              "Prediction rows not persisted because the background writer queue was full.")
+
+def resolve_student_pks(db: Session, student_ids) -> Dict[int, int]:
+    """Map raw `student_id`s to `students.id` with chunked IN queries."""
+    student_ids = list({sid for sid in student_ids if sid is not None})
+    pks = {}
+    for i in range(0, len(student_ids), IN_CHUNK):
+        chunk = student_ids[i:i + IN_CHUNK]
+        pks.update(db.execute(select(models.Student.student_id, models.Student.id).where(models.Student.student_id.in_(chunk))).all())
+    return pks
+
+LATEST_FIELDS = ("raw_student_id", "student_id", "predicted_label", "probability", "model_id")
+
+def upsert_latest_predictions(db: Session, rows: List[dict]):
+    """Keep `latest_predictions` at one row per `raw_student_id`; later rows in `rows` win."""
+    # NaN != NaN: a float NaN id would be stored as NULL, and SQLite turns a NULL INTEGER PRIMARY KEY into a new rowid
+    latest = {r["raw_student_id"]: {k: r[k] for k in LATEST_FIELDS} for r in rows
+              if r["raw_student_id"] is not None and r["raw_student_id"] == r["raw_student_id"]}
+    if not latest:
+        return
+    table = models.LatestPrediction.__table__
+    values = list(latest.values())
+    dialect_insert = _dialect_insert(db.get_bind().dialect.name)
+    if dialect_insert is not None:
+        stmt = dialect_insert(table)
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[table.c.raw_student_id],
+            set_={**{k: stmt.excluded[k] for k in LATEST_FIELDS[1:]}, "updated_at": func.now()}), values)
+        return
+    keys = list(latest)
+    for i in range(0, len(keys), IN_CHUNK):
+        db.execute(delete(table).where(table.c.raw_student_id.in_(keys[i:i + IN_CHUNK])))
+    db.execute(insert(table), values)
+
+def persist_predictions(db: Session, rows: List[dict]) -> int:
+    """Bulk insert prediction rows keyed by `raw_student_id` and refresh `latest_predictions`; the caller commits."""
+    if not rows:
+        return 0
+    pks = resolve_student_pks(db, (r["raw_student_id"] for r in rows))
+    rows = [dict(r, student_id=pks.get(r["raw_student_id"])) for r in rows]
+    db.execute(insert(models.Prediction.__table__), rows)
+    upsert_latest_predictions(db, rows)
+    return len(rows)
+
+class PredictionWriter:
+    """Background thread that drains queued prediction rows into bulk inserts.
+
+    Used when PREDICTION_PERSIST_MODE=background so /predict can answer as
+    soon as probabilities are computed. The queue is bounded: blocking
+    callers (bulk jobs on worker threads) get back-pressure, non-blocking
+    ones (the event loop) drop the batch and count it instead of stalling.
+    """
+    def __init__(self, max_queue: int = 1000, max_rows: int = 5000):
+        self.max_rows = max_rows
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def submit(self, rows: List[dict], block: bool = True) -> bool:
+        """Queue rows for the writer; with `block=False` a full queue drops them and returns False."""
+        if self._thread is None:
+            self.start()
+        if block:
+            self._queue.put(rows)
+            return True
+        try:
+            self._queue.put_nowait(rows)
+            return True
+        except queue.Full:
+            dropped_predictions.inc(len(rows))
+            logger.warning("Prediction writer queue full; dropped %d predictions", len(rows))
+            return False
+
+    def start(self):
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True, name="prediction-writer")
+                self._thread.start()
+                atexit.register(self.stop)
+
+    def flush(self):
+        self._queue.join()
+
+    def stop(self):
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout=10)
+            self._thread = None
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            n = len(batch[0] or ())
+            while n < self.max_rows and batch[-1] is not None:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+                n += len(batch[-1] or ())
+            stop = None in batch
+            rows = [r for item in batch if item is not None for r in item]
+            try:
+                if rows:
+                    db = SessionLocal()
+                    try:
+                        persist_predictions(db, rows)
+                        db.commit()
+                    finally:
+                        db.close()
+            except Exception:
+                logger.exception("Failed to persist %d predictions", len(rows))
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if stop:
+                return
+
+prediction_writer = PredictionWriter()
+
+def _encode_cursor(probability, raw_student_id) -> str:
+    return base64.urlsafe_b64encode(json.dumps([probability, raw_student_id]).encode()).decode()
+
+def _decode_cursor(cursor: str):
+    try:
+        probability, raw_student_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return float(probability), int(raw_student_id)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+
+def query_latest_predictions(db: Session, min_probability: Optional[float] = None, max_probability: Optional[float] = None,
+                             predicted_label: Optional[int] = None, model_id: Optional[int] = None,
+                             order: str = "desc", limit: int = 100, cursor: Optional[str] = None) -> Dict[str, Any]:
+    """Page through `latest_predictions` by probability with keyset pagination.
+
+    Rows are ordered by `(probability, raw_student_id)`, which the
+    `ix_latest_predictions_probability` index serves directly; `cursor` is
+    the opaque `next_cursor` of the previous page.
+    """
+    L = models.LatestPrediction
+    desc = order == "desc"
+    q = select(L).where(L.probability.isnot(None))
+    if min_probability is not None:
+        q = q.where(L.probability >= min_probability)
+    if max_probability is not None:
+        q = q.where(L.probability <= max_probability)
+    if predicted_label is not None:
+        q = q.where(L.predicted_label == predicted_label)
+    if model_id is not None:
+        q = q.where(L.model_id == model_id)
+    if cursor:
+        prob, sid = _decode_cursor(cursor)
+        if desc:
+            q = q.where(or_(L.probability < prob, and_(L.probability == prob, L.raw_student_id < sid)))
+        else:
+            q = q.where(or_(L.probability > prob, and_(L.probability == prob, L.raw_student_id > sid)))
+    keys = (L.probability.desc(), L.raw_student_id.desc()) if desc else (L.probability.asc(), L.raw_student_id.asc())
+    rows = db.execute(q.order_by(*keys).limit(limit + 1)).scalars().all()
+    items = [{
+        "student_id": r.raw_student_id, "predicted_label": r.predicted_label, "probability": r.probability,
+        "model_id": r.model_id, "updated_at": r.updated_at.isoformat() if r.updated_at else None,
+    } for r in rows[:limit]]
+    more = len(rows) > limit
+    return {"items": items, "next_cursor": _encode_cursor(rows[limit - 1].probability, rows[limit - 1].raw_student_id) if more else None}
@@ -0,0 +1,92 @@
+import os
+import time
+import logging
+import threading
+from collections import namedtuple
+from .artifacts import load_artifact, latest_artifact
+from .metrics import model_cache, timed
+
+logger = logging.getLogger(__name__)
+
+LoadedModel = namedtuple("LoadedModel", ["model_id", "model", "encoder", "path", "version"])
+
+class ModelRegistry:
+    """Process-wide holder for the currently served model.
+
+    The artifact is loaded once and kept resident. `get()` re-checks the
+    latest `ModelArtifact` row for `model_name` at most every
+    `check_interval` seconds; artifact files are immutable per id, so a new
+    id means a new model. It is loaded off to the side and swapped in with a
+    single reference assignment, so requests already holding the old
+    snapshot finish on it undisturbed. Without any artifact rows the legacy
+    `MODEL_PATH` file is served, keyed on its mtime.
+    """
+    def __init__(self, model_name: str = None, legacy_path: str = None, check_interval: float = None):
+        self.model_name = model_name or os.environ.get("MODEL_NAME", "dropout-model")
+        self.legacy_path = legacy_path or os.environ.get(
+            "MODEL_PATH", os.path.join(os.environ.get("MODEL_DIR", "./models"), "dropout_model.pkl"))
+        if check_interval is None:
+            check_interval = float(os.environ.get("MODEL_REGISTRY_CHECK_SECONDS", "5"))
+        self.check_interval = check_interval
+        self._current = None
+        self._last_check = 0.0
+        self._reload_lock = threading.Lock()
+        self._listeners = []
+
+    def add_listener(self, fn):
+        """Call `fn(loaded)` whenever a new model is swapped in."""
+        self._listeners.append(fn)
+
+    def get(self):
+        current = self._current
+        if current is None or time.monotonic() - self._last_check >= self.check_interval:
+            current = self.refresh()
+        else:
+            model_cache.inc(result="hit")
+        return current
+
+    def invalidate(self):
+        self._last_check = 0.0
+
+    def reset(self):
+        """Forget the loaded model so the next `get` reloads even if the version looks unchanged."""
+        with self._reload_lock:
+            self._current = None
+            self._last_check = 0.0
+
+    def _locate(self):
+        artifact = latest_artifact(self.model_name)
+        if artifact is not None and os.path.exists(artifact.path):
+            return artifact.id, artifact.path, artifact.metadata_json, ("artifact", artifact.id)
+        if os.path.exists(self.legacy_path):
+            return None, self.legacy_path, None, ("legacy", os.path.getmtime(self.legacy_path))
+        return None
+
+    def refresh(self):
+        # Only one thread reloads; the rest keep serving the current snapshot
+        # unless there is nothing loaded yet, in which case they wait for it.
+        if not self._reload_lock.acquire(blocking=self._current is None):
+            return self._current
+        try:
+            if self._current is not None and time.monotonic() - self._last_check < self.check_interval:
+                return self._current
+            self._last_check = time.monotonic()
+            located = self._locate()
+            if located is None:
+                return self._current
+            model_id, path, metadata, version = located
+            if self._current is not None and self._current.version == version:
+                model_cache.inc(result="hit")
+                return self._current
+            model_cache.inc(result="miss")
+            with timed("model_load"):
+                model, encoder = load_artifact(path, metadata)
+            self._current = LoadedModel(model_id, model, encoder, path, version)
+            logger.info("Loaded model artifact %s from %s", model_id, path)
+            for fn in self._listeners:
+                fn(self._current)
+            return self._current
+        finally:
+            self._reload_lock.release()
+
+registry = ModelRegistry()
@@ -0,0 +1,88 @@
+"""Retention/compaction for the `predictions` history.
+
+Rows older than `PREDICTION_RETENTION_DAYS` are rolled up into
+`prediction_daily_aggregates` (count, positives and probability
+sum/min/max per day and model) and deleted, one day per transaction.
+`latest_predictions` is maintained separately and never compacted.
+"""
+import os
+import logging
+import argparse
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict
+from sqlalchemy import select, delete, func, literal, String
+from .database import SessionLocal
+from . import models
+
+logger = logging.getLogger(__name__)
+
+RETENTION_DAYS = int(os.environ.get("PREDICTION_RETENTION_DAYS", "90"))
+COMPACTION_INTERVAL_HOURS = float(os.environ.get("PREDICTION_COMPACTION_INTERVAL_HOURS", "24"))
+
+def _merge(agg: models.PredictionDailyAggregate, n, positives, prob_sum, prob_min, prob_max):
+    agg.n = (agg.n or 0) + n
+    agg.positives = (agg.positives or 0) + (positives or 0)
+    if prob_sum is not None:
+        agg.probability_sum = (agg.probability_sum or 0.0) + prob_sum
+        agg.probability_min = prob_min if agg.probability_min is None else min(agg.probability_min, prob_min)
+        agg.probability_max = prob_max if agg.probability_max is None else max(agg.probability_max, prob_max)
+
+def _bound(db, dt: datetime):
+    # SQLite stores server-default timestamps as 'YYYY-MM-DD HH:MM:SS' text, while a bound datetime renders with
+    # '.000000' and sorts after a row stamped exactly at midnight; compare against the stored format instead
+    if db.get_bind().dialect.name == "sqlite":
+        return literal(dt.replace(tzinfo=None).isoformat(sep=" ", timespec="seconds"), String)
+    return dt
+
+def compact_predictions(retention_days: int = None, now: datetime = None) -> Dict[str, Any]:
+    """Roll up and delete `Prediction` rows from whole days older than `retention_days` (0 disables)."""
+    retention_days = RETENTION_DAYS if retention_days is None else retention_days
+    stats = {"days": 0, "rows": 0, "cutoff": None}
+    if retention_days <= 0:
+        return stats
+    now = now or datetime.now(timezone.utc)
+    cutoff = datetime(now.year, now.month, now.day, tzinfo=timezone.utc) - timedelta(days=retention_days)
+    stats["cutoff"] = cutoff.isoformat()
+    P, A = models.Prediction, models.PredictionDailyAggregate
+    db = SessionLocal()
+    try:
+        day = datetime.min.replace(tzinfo=timezone.utc)
+        while True:
+            # jump straight to the next day that has rows instead of walking empty days
+            oldest = db.execute(select(func.min(P.created_at))
+                                .where(P.created_at >= _bound(db, day), P.created_at < _bound(db, cutoff))).scalar()
+            if oldest is None:
+                break
+            day = datetime(oldest.year, oldest.month, oldest.day, tzinfo=timezone.utc)
+            nxt = day + timedelta(days=1)
+            window = (P.created_at >= _bound(db, day), P.created_at < _bound(db, nxt))
+            groups = db.execute(
+                select(P.model_id, func.count(P.id), func.sum(P.predicted_label), func.sum(P.probability),
+                       func.min(P.probability), func.max(P.probability)).where(*window).group_by(P.model_id)
+            ).all()
+            if groups:
+                for model_id, *values in groups:
+                    agg = db.execute(select(A).where(A.day == day.date(), A.model_id.is_(None) if model_id is None
+                                                     else A.model_id == model_id)).scalar_one_or_none()
+                    if agg is None:
+                        agg = A(day=day.date(), model_id=model_id)
+                        db.add(agg)
+                    _merge(agg, *values)
+                deleted = db.execute(delete(P).where(*window)).rowcount
+                db.commit()
+                stats["days"] += 1
+                stats["rows"] += deleted
+            day = nxt
+        logger.info("Compacted %d prediction rows from %d days before %s", stats["rows"], stats["days"], stats["cutoff"])
+        return stats
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Roll old predictions up into daily aggregates.")
+    parser.add_argument("--days", type=int, default=None, help="retention in days (default PREDICTION_RETENTION_DAYS)")
+    print(compact_predictions(parser.parse_args().days))
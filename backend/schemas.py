@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Any, Dict, Optional, List, Union
 
 class StudentIn(BaseModel):
     student_id: Optional[int]
@@ -20,6 +20,12 @@ class TrainRequest(BaseModel):
     model_name: Optional[str] = "dropout-model"
     test_size: Optional[float] = 0.2
     max_iter: Optional[int] = 1000
+    mode: Optional[str] = "full"
+    full_refit_every: Optional[int] = None
+    n_jobs: Optional[int] = None
+    candidates: Optional[Union[Dict[str, List[Dict[str, Any]]], List[str]]] = None
+    cv_folds: Optional[int] = None
+    scoring: Optional[str] = None
 
 class PredictRequest(BaseModel):
     students: List[StudentIn]
@@ -0,0 +1,18 @@
+from typing import List, Tuple
+import numpy as np
+from .metrics import timed
+
+def score_arrays(loaded, students) -> Tuple[np.ndarray, np.ndarray]:
+    """Encode a batch (records or a DataFrame) and return `(labels, probabilities)` arrays."""
+    model = loaded.model
+    with timed("predict_encode"):
+        X = loaded.encoder.transform(students)
+    with timed("predict_inference"):
+        preds = model.predict(X)
+        probs = model.predict_proba(X)[:, 1] if hasattr(model, "predict_proba") else np.full(len(preds), np.nan)
+    return preds, probs
+
+def score(loaded, students) -> Tuple[List[int], List[float]]:
+    """Encode a batch of student records and run it through the loaded model."""
+    preds, probs = score_arrays(loaded, students)
+    return preds.tolist(), [None if np.isnan(p) else p for p in probs.tolist()]
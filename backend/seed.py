@@ -1,8 +1,9 @@
-from .database import SessionLocal, engine, Base
+from .database import SessionLocal, engine
+from .migrations import upgrade
 from . import models
 from .train_model import train_and_save_model
 def seed():
-    Base.metadata.create_all(bind=engine)
+    upgrade(engine)
     db = SessionLocal()
     try:
         # sample users - adapted to students
@@ -0,0 +1,104 @@
+import os
+import time
+import shutil
+import logging
+import tempfile
+from typing import Any, Dict, List, Tuple
+import joblib
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import get_scorer
+from sklearn.model_selection import StratifiedKFold
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+logger = logging.getLogger(__name__)
+
+SELECTION_N_JOBS = int(os.environ.get("TRAIN_SELECTION_JOBS", "-1"))
+DEFAULT_FOLDS = int(os.environ.get("TRAIN_CV_FOLDS", "5"))
+
+def _logistic(**kw):
+    return Pipeline([("scale", StandardScaler()), ("clf", LogisticRegression(max_iter=1000, **kw))])
+
+def _random_forest(n_jobs=1, **kw):
+    return Pipeline([("clf", RandomForestClassifier(random_state=42, n_jobs=n_jobs, class_weight="balanced", **kw))])
+
+def _gradient_boosting(**kw):
+    return Pipeline([("clf", GradientBoostingClassifier(random_state=42, **kw))])
+
+ESTIMATORS = {"logistic": _logistic, "random_forest": _random_forest, "gradient_boosting": _gradient_boosting}
+# estimators whose own fit runs in parallel; binary lbfgs logistic regression and gradient boosting are single-threaded
+PARALLEL_FIT = {"random_forest"}
+
+DEFAULT_GRID = {
+    "logistic": [{"C": 0.1}, {"C": 1.0}, {"C": 10.0}],
+    "random_forest": [{"n_estimators": 100, "max_depth": 8}, {"n_estimators": 200, "max_depth": None}],
+    "gradient_boosting": [{"n_estimators": 100, "max_depth": 3}],
+}
+
+def expand_grid(grid=None) -> List[Tuple[str, Dict[str, Any]]]:
+    """`{"name": [params, ...]}` (or a list of names, using the defaults) -> [(name, params), ...]."""
+    grid = grid or DEFAULT_GRID
+    if isinstance(grid, (list, tuple)):
+        grid = {name: DEFAULT_GRID.get(name, [{}]) for name in grid}
+    unknown = set(grid) - set(ESTIMATORS)
+    if unknown:
+        raise ValueError(f"Unknown candidate estimators: {sorted(unknown)}")
+    return [(name, dict(p)) for name, options in grid.items() for p in (options or [{}])]
+
+def build(name: str, params: Dict[str, Any]) -> Pipeline:
+    return ESTIMATORS[name](**params)
+
+def _fit_fold(name, params, X, y, train_idx, test_idx, scoring):
+    model = build(name, params)
+    t0 = time.perf_counter()
+    model.fit(X[train_idx], y[train_idx])
+    fit_seconds = time.perf_counter() - t0
+    return get_scorer(scoring)(model, X[test_idx], y[test_idx]), fit_seconds
+
+def select_model(X: np.ndarray, y: np.ndarray, grid=None, folds: int = None, scoring: str = "roc_auc",
+                 n_jobs: int = None) -> Tuple[Pipeline, Dict[str, Any]]:
+    """k-fold CV over every candidate in `grid` on a process pool; returns the refit winner and a report.
+
+    `n_jobs` (default TRAIN_SELECTION_JOBS) sizes the CV pool and, for
+    estimators in PARALLEL_FIT, the final refit on the whole training set.
+
+    The encoded matrix is dumped once to a temp dir and memory-mapped, so
+    the workers share one read-only copy instead of each receiving (or
+    re-encoding) the data for every (candidate, fold) task.
+    """
+    candidates = expand_grid(grid)
+    folds = max(2, min(folds or DEFAULT_FOLDS, int(np.bincount(y).min())))
+    splits = list(StratifiedKFold(n_splits=folds, shuffle=True, random_state=42).split(X, y))
+    cache_dir = tempfile.mkdtemp(prefix="train-select-")
+    try:
+        path = os.path.join(cache_dir, "X.joblib")
+        joblib.dump(np.ascontiguousarray(X, dtype=np.float64), path)
+        X_shared = joblib.load(path, mmap_mode="r")
+        tasks = [(c, f) for c in range(len(candidates)) for f in range(folds)]
+        results = Parallel(n_jobs=n_jobs or SELECTION_N_JOBS, backend="loky")(
+            delayed(_fit_fold)(*candidates[c], X_shared, y, *splits[f], scoring) for c, f in tasks)
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+    report = []
+    for c, (name, params) in enumerate(candidates):
+        scores, times = zip(*results[c * folds:(c + 1) * folds])
+        report.append({"name": name, "params": params, "mean_score": float(np.mean(scores)),
+                       "std_score": float(np.std(scores)), "fit_seconds": float(np.sum(times))})
+    best = max(report, key=lambda r: r["mean_score"])
+    logger.info("Model selection: %s %s won with %s=%.4f over %d candidates",
+                best["name"], best["params"], scoring, best["mean_score"], len(report))
+    winner = build(best["name"], best["params"])
+    # CV keeps every core busy with one single-threaded fit each; the lone refit parallelizes inside the estimator
+    parallel = best["name"] in PARALLEL_FIT and "n_jobs" not in best["params"]
+    if parallel:
+        winner.set_params(clf__n_jobs=n_jobs or SELECTION_N_JOBS)
+    t0 = time.perf_counter()
+    winner.fit(X, y)
+    if parallel:
+        # scoring one request at a time through a thread pool only adds overhead
+        winner.set_params(clf__n_jobs=1)
+    return winner, {"scoring": scoring, "folds": folds, "winner": {"name": best["name"], "params": best["params"],
+                    "refit_seconds": time.perf_counter() - t0}, "candidates": report}
@@ -1,72 +1,145 @@
 import os
+import logging
 import joblib
+from joblib import parallel_config
 import pandas as pd
-from sqlalchemy.orm import Session
+from datetime import datetime, timezone
 from sklearn.model_selection import train_test_split
-from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import get_scorer
+from sklearn.linear_model import LogisticRegression, SGDClassifier
 from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
 from typing import Dict, Any
 from .database import SessionLocal
 from . import models
+from .features import FeatureEncoder
+from .columnar import load_student_columns
+from .registry import registry
+from .artifacts import save_artifact, latest_artifact
+from .metrics import timed
+from .selection import select_model
+
+logger = logging.getLogger(__name__)
 
 MODEL_DIR = os.environ.get("MODEL_DIR", "./models")
-MODEL_PATH = os.environ.get("MODEL_PATH", os.path.join(MODEL_DIR, "dropout_model.pkl"))
 os.makedirs(MODEL_DIR, exist_ok=True)
+# in incremental mode, force a full refit after this many consecutive partial_fit runs
+FULL_REFIT_EVERY = int(os.environ.get("TRAIN_FULL_REFIT_EVERY", "10"))
+
+def fetch_training_data(since_id: int = None) -> pd.DataFrame:
+    return pd.DataFrame(load_student_columns(labelled_only=True, since_id=since_id))
 
-def fetch_training_data() -> pd.DataFrame:
-    db: Session = SessionLocal()
+def last_training_run(model_name: str = "dropout-model") -> models.TrainingRun:
+    db = SessionLocal()
     try:
-        q = db.query(models.Student).filter(models.Student.drop_out != None).all()
-        rows = []
-        for r in q:
-            rows.append({
-                "student_id": r.student_id,
-                "age": r.age,
-                "gender": r.gender,
-                "attendance_percentage": r.attendance_percentage,
-                "gpa": r.gpa,
-                "parent_education": r.parent_education,
-                "socioeconomic_status": r.socioeconomic_status,
-                "extracurricular_participation": r.extracurricular_participation,
-                "previous_failures": r.previous_failures,
-                "drop_out": r.drop_out
-            })
-        df = pd.DataFrame(rows)
-        return df
+        # runs of other model names carry their own last_student_id / incremental_runs
+        return (db.query(models.TrainingRun).join(models.ModelArtifact, models.TrainingRun.model_id == models.ModelArtifact.id)
+                .filter(models.ModelArtifact.name == model_name).order_by(models.TrainingRun.id.desc()).first())
     finally:
         db.close()
 
-def train_and_save_model(params: Dict[str, Any] = None):
-    params = params or {}
-    df = fetch_training_data()
-    if df.empty or len(df) < 50:
-        print("Not enough labelled rows to train. Need at least ~50 labelled examples.")
-        return {"status": "not_enough_data", "n": len(df)}
-    features = [
-        "student_id", "age", "gender", "attendance_percentage", "gpa",
-        "parent_education", "socioeconomic_status", "extracurricular_participation",
-        "previous_failures"
-    ]
-    X = df[features].copy()
-    y = df["drop_out"]
-    X = pd.get_dummies(X, drop_first=True)
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=params.get("test_size", 0.2), random_state=42
-    )
-    pipeline = Pipeline([("clf", LogisticRegression(max_iter=params.get("max_iter", 1000)))])
-    pipeline.fit(X_train, y_train)
-    trained_features = X.columns.tolist()
-    joblib.dump((pipeline, trained_features), MODEL_PATH)
-    print(f"Model trained and saved: {MODEL_PATH}")
+def _record_run(model_id: int, params: Dict[str, Any], metrics: Dict[str, Any], started_at: datetime, run_id: int = None):
     db = SessionLocal()
     try:
-        m = models.ModelArtifact(name=params.get("model_name", "dropout-model"), path=MODEL_PATH, metadata_json={})
-        db.add(m)
-        db.commit()
-        db.refresh(m)
-        run = models.TrainingRun(model_id=m.id, params=params, metrics={"train_n": len(X_train), "test_n": len(X_test)})
-        db.add(run)
+        run = db.get(models.TrainingRun, run_id) if run_id is not None else None
+        if run is None:
+            run = models.TrainingRun(started_at=started_at)
+            db.add(run)
+        run.model_id = model_id
+        run.params = params
+        run.metrics = dict(metrics, status="trained")
+        run.finished_at = datetime.now(timezone.utc)
         db.commit()
     finally:
         db.close()
-    return {"status":"trained","model_path":MODEL_PATH}
+
+def _incremental_update(params: Dict[str, Any], last_run: models.TrainingRun):
+    """partial_fit the current SGD model on labelled rows added since `last_run`.
+
+    Returns None when the run has to fall back to a full refit.
+    """
+    last_params = (last_run.params or {}) if last_run else {}
+    since_id = last_params.get("last_student_id")
+    refit_every = params.get("full_refit_every") or FULL_REFIT_EVERY
+    artifact = latest_artifact(params.get("model_name") or "dropout-model")
+    if since_id is None or last_params.get("incremental_runs", 0) >= refit_every or artifact is None:
+        return None
+    # a private, writable copy: partial_fit updates the coefficients in place
+    pipeline, encoder = joblib.load(artifact.path)
+    if not isinstance(encoder, FeatureEncoder) or not hasattr(pipeline.steps[-1][1], "partial_fit"):
+        return None
+    with timed("train_fetch"):
+        df = fetch_training_data(since_id=since_id)
+    if df.empty:
+        return {"status": "no_new_data", "n": 0}
+    # preprocessing steps stay frozen at their last full fit; only the classifier moves
+    with timed("train_fit"):
+        X = pipeline[:-1].transform(encoder.transform(df))
+        pipeline.steps[-1][1].partial_fit(X, df["drop_out"].to_numpy(), classes=[0, 1])
+    run_params = dict(params, mode="incremental", last_student_id=int(df["id"].max()),
+                      incremental_runs=last_params.get("incremental_runs", 0) + 1)
+    return pipeline, encoder, run_params, {"train_n": len(df), "test_n": 0}
+
+def train_and_save_model(params: Dict[str, Any] = None, run_id: int = None):
+    """Train (or incrementally update) the model and record it.
+
+    `run_id` names an existing `TrainingRun` job row to complete; without
+    it a new row is created.
+    """
+    params = params or {}
+    # n_jobs reaches joblib-based work (CV in select mode, forest fits); the binary lbfgs logistic regression used by
+    # the full mode and the SGD model of the incremental mode are single-threaded and ignore it
+    with timed("train_total"), parallel_config(n_jobs=params.get("n_jobs")):
+        return _train_and_save_model(params, run_id)
+
+def _train_and_save_model(params: Dict[str, Any], run_id: int = None):
+    started_at = datetime.now(timezone.utc)
+    incremental = params.get("mode") == "incremental"
+    update = _incremental_update(params, last_training_run(params.get("model_name") or "dropout-model")) if incremental else None
+    if update is not None and "status" in update:
+        logger.info("No new labelled rows since the last training run.")
+        return update
+    if update is not None:
+        pipeline, encoder, run_params, metrics = update
+    else:
+        with timed("train_fetch"):
+            df = fetch_training_data()
+        if df.empty or len(df) < 50:
+            logger.info("Not enough labelled rows to train. Need at least ~50 labelled examples.")
+            return {"status": "not_enough_data", "n": len(df)}
+        y = df["drop_out"].to_numpy()
+        with timed("train_encode"):
+            encoder = FeatureEncoder().fit(df)
+            X = encoder.transform(df)
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, y, test_size=params.get("test_size", 0.2), random_state=42
+        )
+        metrics = {"train_n": len(X_train), "test_n": len(X_test)}
+        if params.get("mode") == "select":
+            with timed("train_select"):
+                pipeline, metrics["selection"] = select_model(
+                    X_train, y_train, grid=params.get("candidates"), folds=params.get("cv_folds"),
+                    scoring=params.get("scoring") or "roc_auc", n_jobs=params.get("n_jobs"))
+            if len(X_test):
+                metrics["holdout_score"] = float(get_scorer(metrics["selection"]["scoring"])(pipeline, X_test, y_test))
+        else:
+            if incremental:
+                # SGD keeps the model updatable with partial_fit on later runs
+                pipeline = Pipeline([
+                    ("scale", StandardScaler()),
+                    ("clf", SGDClassifier(loss="log_loss", max_iter=params.get("max_iter", 1000), random_state=42))
+                ])
+            else:
+                pipeline = Pipeline([("clf", LogisticRegression(max_iter=params.get("max_iter", 1000)))])
+            with timed("train_fit"):
+                pipeline.fit(X_train, y_train)
+        run_params = dict(params, mode="select" if params.get("mode") == "select" else "full",
+                          last_student_id=int(df["id"].max()), incremental_runs=0)
+    with timed("train_save"):
+        model_id, model_path = save_artifact(pipeline, encoder, run_params.get("model_name") or "dropout-model",
+                                             metadata={"mode": run_params["mode"], "estimator": type(pipeline.steps[-1][1]).__name__},
+                                             model_dir=MODEL_DIR)
+        logger.info("Model trained (%s) and saved: %s", run_params["mode"], model_path)
+        _record_run(model_id, run_params, metrics, started_at, run_id)
+    registry.invalidate()
+    return {"status":"trained","mode":run_params["mode"],"model_path":model_path,"model_id":model_id}
@@ -0,0 +1,252 @@
+"""Throughput benchmarks for the ingest, train and predict hot paths.
+
+    python benchmarks/bench.py --scales 10000,100000 --out bench.json
+    python benchmarks/bench.py --scales 10000 --baseline bench.json --threshold 0.2
+    python benchmarks/bench.py --scales 10000 --concurrency 8 --db-async --baseline sync.json
+
+Each scale runs against a fresh SQLite file in --workdir using synthetic
+students from `generate_dummy.generate_dummy_data`, with the /predict result
+cache off unless --prediction-cache is given. With --baseline the run
+exits non-zero if any rows/sec drops, or any p95 latency grows, by more than
+--threshold relative to the baseline results.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _records(df):
+    return df.astype(object).where(df.notna(), None).to_dict("records")
+
+def _percentiles(samples):
+    import numpy as np
+    arr = np.asarray(samples) * 1000.0
+    return {"p50_ms": round(float(np.percentile(arr, 50)), 3),
+            "p95_ms": round(float(np.percentile(arr, 95)), 3),
+            "p99_ms": round(float(np.percentile(arr, 99)), 3)}
+
+def _proc_status_mb(field):
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    return None
+
+def _rss_mb():
+    current = _proc_status_mb("VmRSS")
+    return current if current is not None else resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+def _stage_memory():
+    """Start measuring a stage; the returned callable gives its RSS growth and peak above the starting RSS.
+
+    On Linux the high-water mark is reset per stage via /proc/self/clear_refs, so
+    the peak belongs to this stage alone and excludes whatever the harness
+    already holds. Elsewhere ru_maxrss is the only peak available and it never
+    goes down, so there `peak_rss_delta_mb` is only the growth of the process peak.
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+    start = _rss_mb()
+
+    def done():
+        peak = _proc_status_mb("VmHWM")
+        if peak is None:
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+        return {"rss_delta_mb": round(_rss_mb() - start, 1), "peak_rss_delta_mb": round(max(peak - start, 0.0), 1)}
+    return done
+
+def _timed_requests(fn, payloads):
+    latencies = []
+    started = time.perf_counter()
+    for p in payloads:
+        t0 = time.perf_counter()
+        fn(p)
+        latencies.append(time.perf_counter() - t0)
+    return time.perf_counter() - started, latencies
+
+def run_concurrent(app, records, threads, seconds, ingest_batch=100):
+    """Mixed load: half the threads ingest small batches, half send single-student /predict calls."""
+    import threading
+    from fastapi.testclient import TestClient
+    lat = {"ingest": [], "predict": []}
+    rows = {"ingest": 0, "predict": 0}
+    errors = {"ingest": 0, "predict": 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+    offset = max(r["student_id"] for r in records) * 10
+
+    def worker(k):
+        client = TestClient(app)
+        kind = "ingest" if k % 2 == 0 else "predict"
+        i = 0
+        while time.perf_counter() < deadline:
+            if kind == "ingest":
+                base = offset + (k * 1_000_000) + i * ingest_batch
+                batch = [dict(records[(i * ingest_batch + j) % len(records)], student_id=base + j) for j in range(ingest_batch)]
+                payload, n = {"students": batch}, ingest_batch
+            else:
+                payload, n = {"students": [dict(records[i % len(records)], drop_out=None)]}, 1
+            t0 = time.perf_counter()
+            ok = client.post("/" + ("ingest/students" if kind == "ingest" else "predict"), json=payload).status_code == 200
+            dt = time.perf_counter() - t0
+            with lock:
+                lat[kind].append(dt)
+                rows[kind] += n if ok else 0
+                errors[kind] += 0 if ok else 1
+            i += 1
+
+    started = time.perf_counter()
+    pool = [threading.Thread(target=worker, args=(k,)) for k in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    total = time.perf_counter() - started
+    return {
+        kind: {"rows_per_sec": round(rows[kind] / total, 1), "errors": errors[kind],
+               **(_percentiles(lat[kind]) if lat[kind] else {})}
+        for kind in ("ingest", "predict")
+    }
+
+def run_scale(n, workdir, ingest_batch=1000, predict_requests=200, predict_batch=100, concurrency=0, concurrent_seconds=10):
+    from fastapi.testclient import TestClient
+    from generate_dummy import generate_dummy_data
+    from backend.database import Base, engine
+    from backend.api import app
+    from backend.registry import registry
+    from backend.cache import prediction_cache
+    from backend.train_model import train_and_save_model
+    import main
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    # artifact ids restart with the tables, so ("artifact", 1) from the previous scale would look current
+    registry.reset()
+    prediction_cache.clear()
+    client = TestClient(app)
+    df = generate_dummy_data(n)
+    records = _records(df)
+    out = {"n": n}
+
+    def post(path):
+        def _send(payload):
+            r = client.post(path, json=payload)
+            r.raise_for_status()
+        return _send
+
+    batches = [{"students": records[i:i + ingest_batch]} for i in range(0, n, ingest_batch)]
+    mem = _stage_memory()
+    total, lat = _timed_requests(post("/ingest/students"), batches)
+    out["ingest"] = {"rows_per_sec": round(n / total, 1), **_percentiles(lat), **mem()}
+
+    csv_path = os.path.join(workdir, f"students_{n}.csv")
+    df.assign(student_id=df["student_id"] + n).to_csv(csv_path, index=False)
+    mem = _stage_memory()
+    t0 = time.perf_counter()
+    main.bulk_load_csv_to_students(csv_path)
+    total = time.perf_counter() - t0
+    out["bulk_load"] = {"rows_per_sec": round(n / total, 1), "seconds": round(total, 3), **mem()}
+
+    mem = _stage_memory()
+    t0 = time.perf_counter()
+    res = train_and_save_model({"test_size": 0.2})
+    total = time.perf_counter() - t0
+    out["train"] = {"rows_per_sec": round(2 * n / total, 1), "seconds": round(total, 3),
+                    "status": res.get("status"), **mem()}
+
+    unlabelled = [dict(r, drop_out=None) for r in records[:max(predict_batch, predict_requests)]]
+    singles = [{"students": [unlabelled[i % len(unlabelled)]]} for i in range(predict_requests)]
+    mem = _stage_memory()
+    total, lat = _timed_requests(post("/predict"), singles)
+    out["predict_single"] = {"rows_per_sec": round(predict_requests / total, 1), **_percentiles(lat), **mem()}
+    batched = [{"students": unlabelled[:predict_batch]} for _ in range(max(1, predict_requests // 10))]
+    mem = _stage_memory()
+    total, lat = _timed_requests(post("/predict"), batched)
+    out["predict_batch"] = {"rows_per_sec": round(len(batched) * predict_batch / total, 1), **_percentiles(lat), **mem()}
+    if concurrency:
+        mixed = run_concurrent(app, unlabelled, concurrency, concurrent_seconds)
+        out["concurrent_ingest"] = dict(mixed["ingest"], threads=concurrency)
+        out["concurrent_predict"] = dict(mixed["predict"], threads=concurrency)
+    return out
+
+def compare(results, baseline, threshold):
+    """Return human-readable regressions of `results` against `baseline`."""
+    regressions = []
+    base_by_n = {r["n"]: r for r in baseline.get("results", [])}
+    for r in results["results"]:
+        base = base_by_n.get(r["n"])
+        if not base:
+            continue
+        for stage, metrics in r.items():
+            if not isinstance(metrics, dict) or stage not in base:
+                continue
+            old = base[stage]
+            if old.get("rows_per_sec") and metrics.get("rows_per_sec") is not None:
+                if metrics["rows_per_sec"] < old["rows_per_sec"] * (1 - threshold):
+                    regressions.append(f"n={r['n']} {stage}: rows/sec {old['rows_per_sec']} -> {metrics['rows_per_sec']}")
+            if old.get("p95_ms") and metrics.get("p95_ms") is not None:
+                if metrics["p95_ms"] > old["p95_ms"] * (1 + threshold):
+                    regressions.append(f"n={r['n']} {stage}: p95 {old['p95_ms']}ms -> {metrics['p95_ms']}ms")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", default="10000", help="comma-separated student counts, e.g. 10000,100000,1000000")
+    parser.add_argument("--workdir", default=None, help="directory for the SQLite file, CSVs and model artifacts")
+    parser.add_argument("--out", default="bench_results.json")
+    parser.add_argument("--baseline", default=None, help="previous results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed relative regression (0.2 = 20%%)")
+    parser.add_argument("--predict-requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=0,
+                        help="threads for the mixed concurrent ingest + predict stage (0 skips it)")
+    parser.add_argument("--concurrent-seconds", type=float, default=10)
+    parser.add_argument("--db-async", action="store_true", help="serve through the async engine (DB_ASYNC=1)")
+    parser.add_argument("--prediction-cache", action="store_true",
+                        help="keep the /predict result cache on; the predict stages repeat records, so this mostly measures hits")
+    args = parser.parse_args(argv)
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="bench_")
+    os.makedirs(workdir, exist_ok=True)
+    # must be set before anything under backend/ is imported
+    os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(os.path.abspath(workdir), "bench.db")
+    os.environ["MODEL_DIR"] = os.path.join(workdir, "models")
+    if args.db_async:
+        os.environ["DB_ASYNC"] = "1"
+    if not args.prediction_cache:
+        os.environ["PREDICTION_CACHE_SIZE"] = "0"
+    sys.path.insert(0, ROOT)
+
+    results = {"created_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "db_async": args.db_async,
+               "prediction_cache": args.prediction_cache, "results": []}
+    for n in [int(s) for s in args.scales.split(",") if s]:
+        r = run_scale(n, workdir, predict_requests=args.predict_requests,
+                      concurrency=args.concurrency, concurrent_seconds=args.concurrent_seconds)
+        print(json.dumps(r))
+        results["results"].append(r)
+    with open(args.out, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.out}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        for line in regressions:
+            print("REGRESSION", line)
+        if regressions:
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
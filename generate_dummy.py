@@ -1,6 +1,11 @@
 import pandas as pd
 import numpy as np
 import os
+import argparse
+
+GENDERS = ['Male', 'Female']
+PARENT_EDUCATION = ['High School', 'Graduate', 'Postgraduate']
+SOCIOECONOMIC_STATUS = ['Low', 'Medium', 'High']
 
 def generate_dummy_data(num_students: int = 2000 , seed: int = 42):
     np.random.seed(seed)
@@ -31,13 +36,91 @@ def generate_dummy_data(num_students: int = 2000 , seed: int = 42):
 
     return data
 
+def _skewed(rng, levels, n, skew):
+    # skew 0 = uniform; larger values concentrate mass on the first levels (Zipf-like 1/rank**skew)
+    weights = 1.0 / np.arange(1, len(levels) + 1) ** skew
+    return np.asarray(levels, dtype=object)[rng.choice(len(levels), n, p=weights / weights.sum())]
+
+def iter_dummy_chunks(num_students: int, chunk_size: int = 100_000, seed: int = 42, label_ratio: float = 0.15,
+                      category_skew: float = 0.0, labelled_fraction: float = 1.0, start_id: int = 1):
+    """Yield DataFrames of synthetic students, `chunk_size` rows at a time.
+
+    Same columns and risk model as `generate_dummy_data`, with the dropout
+    rate (`label_ratio`), categorical skew and the share of labelled rows
+    (the rest get a null `drop_out`) configurable. Memory use is bounded by
+    `chunk_size`, not `num_students`.
+    """
+    rng = np.random.default_rng(seed)
+    for start in range(0, num_students, chunk_size):
+        n = min(chunk_size, num_students - start)
+        data = pd.DataFrame({
+            'student_id': np.arange(start_id + start, start_id + start + n),
+            'age': rng.integers(16, 23, n),
+            'gender': _skewed(rng, GENDERS, n, category_skew),
+            'attendance_percentage': rng.uniform(50, 100, n),
+            'gpa': rng.uniform(0, 10, n),
+            'parent_education': _skewed(rng, PARENT_EDUCATION, n, category_skew),
+            # the low-income level leads so that skew raises the at-risk share
+            'socioeconomic_status': _skewed(rng, SOCIOECONOMIC_STATUS, n, category_skew),
+            'extracurricular_participation': rng.integers(0, 6, n),
+            'previous_failures': rng.integers(0, 4, n),
+        })
+        risk_score = (
+            (100 - data['attendance_percentage'].to_numpy()) * 0.4 +
+            (10 - data['gpa'].to_numpy()) * 0.3 +
+            data['previous_failures'].to_numpy() * 10 +
+            data['socioeconomic_status'].map({'Low': 10, 'Medium': 5, 'High': 0}).to_numpy() +
+            rng.normal(0, 5, n)
+        )
+        labels = (risk_score >= np.percentile(risk_score, 100 * (1 - label_ratio))).astype(int)
+        if labelled_fraction < 1:
+            labels = pd.array(labels, dtype="Int64")
+            labels[rng.random(n) >= labelled_fraction] = pd.NA
+        data['drop_out'] = labels
+        yield data
+
+def write_dummy_data(path: str, num_students: int, chunk_size: int = 100_000, fmt: str = None, **kwargs) -> int:
+    """Stream `iter_dummy_chunks` to a CSV or Parquet file; returns the number of rows written."""
+    fmt = fmt or ("parquet" if path.lower().endswith((".parquet", ".pq")) else "csv")
+    writer, rows = None, 0
+    try:
+        for i, chunk in enumerate(iter_dummy_chunks(num_students, chunk_size, **kwargs)):
+            if fmt == "parquet":
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                writer = writer or pq.ParquetWriter(path, table.schema)
+                writer.write_table(table)
+            else:
+                chunk.to_csv(path, mode="w" if i == 0 else "a", header=i == 0, index=False)
+            rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
 if __name__ == "__main__":
     BASE_DIR = os.path.dirname(os.path.abspath(__file__))  # src folder
     DATA_FOLDER = os.path.join(BASE_DIR, "../data")
-    os.makedirs(DATA_FOLDER, exist_ok=True)  # create folder if it doesn't exist
 
-    OUTPUT_PATH = os.path.join(DATA_FOLDER, "dummy_students.csv")
+    parser = argparse.ArgumentParser(description="Generate synthetic student data.")
+    parser.add_argument("--rows", type=int, default=None, help="stream this many rows in chunks (default: the 2000-row sample)")
+    parser.add_argument("--out", default=os.path.join(DATA_FOLDER, "dummy_students.csv"), help=".csv or .parquet")
+    parser.add_argument("--chunk-size", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--start-id", type=int, default=1)
+    parser.add_argument("--label-ratio", type=float, default=0.15, help="share of dropouts among labelled rows")
+    parser.add_argument("--labelled-fraction", type=float, default=1.0, help="share of rows with a drop_out label")
+    parser.add_argument("--skew", type=float, default=0.0, help="categorical skew (0 = uniform)")
+    args = parser.parse_args()
+
+    OUTPUT_PATH = args.out
+    os.makedirs(os.path.dirname(os.path.abspath(OUTPUT_PATH)), exist_ok=True)  # create folder if it doesn't exist
 
-    df = generate_dummy_data()
-    df.to_csv(OUTPUT_PATH, index=False)
+    if args.rows is None:
+        df = generate_dummy_data(seed=args.seed)
+        df.to_csv(OUTPUT_PATH, index=False)
+    else:
+        write_dummy_data(OUTPUT_PATH, args.rows, args.chunk_size, seed=args.seed, label_ratio=args.label_ratio,
+                         category_skew=args.skew, labelled_fraction=args.labelled_fraction, start_id=args.start_id)
     print(f" Dummy data saved to {OUTPUT_PATH}")
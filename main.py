@@ -2,17 +2,23 @@
 import os
 import time
 import threading
+import multiprocessing
 import signal
 import logging
-from datetime import datetime, timezone
-import pandas as pd
+import tempfile
+from datetime import datetime, timedelta, timezone
 
 from apscheduler.schedulers.background import BackgroundScheduler
 import uvicorn
 
 from backend.api import app
-from backend.train_model import train_and_save_model
-from backend.database import SessionLocal, Base, engine
+from backend.jobs import training_executor
+from backend.database import SessionLocal, engine
+from backend.migrations import upgrade
+from backend.metrics import timed
+from backend.events import label_events, LabelRelay
+from backend.retention import compact_predictions, COMPACTION_INTERVAL_HOURS
+from backend.importer import import_file, DEFAULT_CHUNK_SIZE
 from backend import models as dbmodels
 from sqlalchemy.orm import Session
 from sqlalchemy import func
@@ -21,38 +27,14 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("main")
 
 def init_db():
-    Base.metadata.create_all(bind=engine)
-    logger.info("Database initialized.")
-
-def bulk_load_csv_to_students(csv_path: str) -> int:
-    if not os.path.exists(csv_path):
-        raise FileNotFoundError(csv_path)
-    df = pd.read_csv(csv_path)
-    processed = 0
-    db: Session = SessionLocal()
-    try:
-        for _, row in df.iterrows():
-            payload = row.to_dict()
-            sid = payload.get("student_id", None)
-            if sid is not None:
-                existing = db.query(dbmodels.Student).filter(dbmodels.Student.student_id == int(sid)).first()
-            else:
-                existing = None
-            allowed = { "student_id","age","gender","attendance_percentage","gpa","parent_education","socioeconomic_status","extracurricular_participation","previous_failures","drop_out" }
-            data = {k: (None if pd.isna(v) else v) for k,v in payload.items() if k in allowed}
-            if existing:
-                for k,v in data.items():
-                    setattr(existing, k, v)
-                db.add(existing)
-            else:
-                new = dbmodels.Student(**data)
-                db.add(new)
-            processed += 1
-        db.commit()
-    finally:
-        db.close()
-    logger.info(f"Bulk loaded {processed} rows from {csv_path}")
-    return processed
+    version = upgrade(engine)
+    logger.info("Database initialized (schema version %d).", version)
+
+def bulk_load_csv_to_students(csv_path: str, chunksize: int = None) -> int:
+    checkpoint = os.environ.get("BULK_CHECKPOINT_PATH", csv_path + ".checkpoint")
+    stats = import_file(csv_path, chunksize or DEFAULT_CHUNK_SIZE, checkpoint_path=checkpoint)
+    logger.info(f"Bulk loaded {stats['rows']} rows from {csv_path} ({stats['inserted']} inserted, {stats['updated']} updated, {stats['chunks']} chunks)")
+    return stats["rows"]
 
 def _api_runner(host: str, port: int):
     uvicorn.run(app, host=host, port=port, log_level="info", access_log=False)
@@ -63,73 +45,195 @@ def start_api_in_thread(host: str='127.0.0.1', port: int=8000):
     logger.info("FastAPI started in background")
     return t
 
+def get_last_training_run(db: Session, model_name: str = None):
+    runs = db.query(dbmodels.TrainingRun).filter(dbmodels.TrainingRun.model_id != None)
+    if model_name:
+        runs = runs.join(dbmodels.ModelArtifact, dbmodels.TrainingRun.model_id == dbmodels.ModelArtifact.id).filter(
+            dbmodels.ModelArtifact.name == model_name)
+    # walks ix_training_runs_finished_at backwards; runs recorded without finished_at are the rare fallback
+    latest = runs.filter(dbmodels.TrainingRun.finished_at != None).order_by(dbmodels.TrainingRun.finished_at.desc()).first()
+    return latest or runs.order_by(dbmodels.TrainingRun.id.desc()).first()
+
 def get_last_training_time(db: Session):
-    latest = db.query(dbmodels.TrainingRun).order_by(dbmodels.TrainingRun.finished_at.desc().nulls_last()).first()
-    if latest and latest.finished_at:
-        return latest.finished_at
-    if latest and latest.started_at:
-        return latest.started_at
-    return None
-
-def count_labeled_since(db: Session, since):
+    latest = get_last_training_run(db)
+    if latest is None:
+        return None
+    return latest.finished_at or latest.started_at
+
+def count_labeled_since(db: Session, since=None, since_id=None):
     q = db.query(func.count(dbmodels.Student.id)).filter(dbmodels.Student.drop_out != None)
-    if since:
+    if since_id is not None:
+        # range count on the partial ix_students_labelled_id index
+        q = q.filter(dbmodels.Student.id > since_id)
+    elif since:
         q = q.filter(dbmodels.Student.created_at > since)
     return int(q.scalar() or 0)
 
+def count_new_labeled(db: Session, model_name: str = "dropout-model"):
+    """New labelled rows since the last training run, plus the position they were counted from.
+
+    The run's `last_student_id` high-water mark makes this an indexed id range
+    count; runs recorded before it existed fall back to `created_at`.
+    """
+    # another model name's run carries a high-water mark this model was never trained up to
+    latest = get_last_training_run(db, model_name)
+    since_id = (latest.params or {}).get("last_student_id") if latest else None
+    since = (latest.finished_at or latest.started_at) if latest else None
+    return count_labeled_since(db, since, since_id), since_id if since_id is not None else since
+
 def trigger_train(params=None):
     params = params or {}
     logger.info("Triggering training with params: %s", params)
     try:
-        res = train_and_save_model(params)
-        logger.info("Training finished: %s", res)
-        return {"status":"ok","result":res}
+        job_id, deduplicated = training_executor.submit(params)
+        logger.info("Training job %s %s", job_id, "already queued" if deduplicated else "queued")
+        return {"status":"ok","job_id":job_id}
     except Exception as e:
         logger.exception("Training failed")
         return {"status":"error","error":str(e)}
 
 class AutoTrainer:
-    def __init__(self, interval_min=60, labeled_threshold=50):
+    """Retrains once `labeled_threshold` new labelled rows have arrived.
+
+    Ingest publishes changed-label counts to `label_events`; crossing the
+    threshold schedules a run after `debounce_s` of quiet (at most
+    `max_delay_s` after the crossing), never sooner than `min_spacing_s`
+    after the previous trigger. In multi-worker mode the counts arrive from
+    the API processes through `relay`, polled every second. The interval
+    poll of the DB remains as a fallback for rows written by other processes.
+    """
+    def __init__(self, interval_min=60, labeled_threshold=50, mode="full", debounce_s=None, min_spacing_s=None, max_delay_s=None,
+                 relay=None, model_name=None):
         self.interval_min = interval_min
+        self.model_name = model_name or os.environ.get("MODEL_NAME", "dropout-model")
+        self.relay = relay
         self.labeled_threshold = labeled_threshold
+        self.mode = mode
+        self.debounce_s = debounce_s if debounce_s is not None else float(os.environ.get("AUTO_TRAIN_DEBOUNCE_SECONDS", "5"))
+        self.min_spacing_s = min_spacing_s if min_spacing_s is not None else float(os.environ.get("AUTO_TRAIN_MIN_SPACING_SECONDS", "300"))
+        self.max_delay_s = max_delay_s if max_delay_s is not None else float(os.environ.get("AUTO_TRAIN_MAX_DELAY_SECONDS", "60"))
         self.scheduler = BackgroundScheduler()
+        self._lock = threading.Lock()
+        self._crossed_at = None
+        self._last_trigger = None
     def start(self):
         self.scheduler.add_job(self.check_and_train, 'interval', minutes=self.interval_min, next_run_time=datetime.now())
+        # prediction retention rides on the same scheduler (and the same process in multi-worker mode)
+        self.scheduler.add_job(compact_predictions, 'interval', hours=COMPACTION_INTERVAL_HOURS, id='compact-predictions')
+        if self.relay is not None:
+            self.scheduler.add_job(self._drain_relay, 'interval', seconds=1, id='label-relay')
         self.scheduler.start()
+        label_events.subscribe(self.on_labels)
         logger.info("AutoTrainer started")
+    def on_labels(self, pending):
+        if pending < self.labeled_threshold:
+            return
+        with self._lock:
+            now = datetime.now()
+            self._crossed_at = self._crossed_at or now
+            run_at = min(now + timedelta(seconds=self.debounce_s), self._crossed_at + timedelta(seconds=self.max_delay_s))
+            if self._last_trigger is not None:
+                run_at = max(run_at, self._last_trigger + timedelta(seconds=self.min_spacing_s))
+            self.scheduler.add_job(self._fire, 'date', run_date=run_at, id='label-trigger', replace_existing=True)
+    def _drain_relay(self):
+        label_events.publish(self.relay.receive())
+    def _fire(self):
+        pending = label_events.pending
+        if pending >= self.labeled_threshold:
+            logger.info("%d labeled rows ingested since last train", pending)
+            self._trigger()
+    def _trigger(self):
+        with self._lock:
+            self._crossed_at = None
+            self._last_trigger = datetime.now()
+        label_events.take()
+        trigger_train({"test_size":0.2, "mode":self.mode, "model_name":self.model_name})
     def check_and_train(self):
         db = SessionLocal()
         try:
-            last = get_last_training_time(db)
-            labeled_new = count_labeled_since(db, last)
+            with timed("autotrain_check"):
+                labeled_new, last = count_new_labeled(db, self.model_name)
             logger.info("Found %d new labeled rows since last train (%s)", labeled_new, last)
             if labeled_new >= self.labeled_threshold:
-                trigger_train({"test_size":0.2})
+                self._trigger()
         finally:
             db.close()
     def stop(self):
+        label_events.unsubscribe(self.on_labels)
+        # the signal handler and the shutdown path both stop the trainer
+        if not self.scheduler.running:
+            return
         self.scheduler.shutdown(wait=False)
         logger.info("AutoTrainer stopped")
 
-def main(bulk_csv=None, host='127.0.0.1', port=8000, interval_min=60, threshold=50, run_initial=False):
+def run_initial_train():
+    db = SessionLocal()
+    try:
+        labeled, _ = count_new_labeled(db)
+        if labeled >= 10:
+            trigger_train({"test_size":0.2})
+    finally:
+        db.close()
+
+def auto_trainer_process(interval_min=60, threshold=50, train_mode="full", run_initial=False, relay_path=None):
+    # entrypoint of the dedicated trainer process in multi-worker mode
+    logging.basicConfig(level=logging.INFO)
+    # this process reads the relay; its own publishes (the drained counts) stay local
+    label_events.relay = None
+    stop = threading.Event()
+    signal.signal(signal.SIGINT, lambda sig, frame: stop.set())
+    signal.signal(signal.SIGTERM, lambda sig, frame: stop.set())
+    trainer = AutoTrainer(interval_min, threshold, train_mode, relay=LabelRelay(relay_path) if relay_path else None)
+    trainer.start()
+    if run_initial:
+        run_initial_train()
+    stop.wait()
+    trainer.stop()
+    training_executor.shutdown(wait=False)
+
+def serve_multiprocess(host, port, workers, interval_min, threshold, train_mode, run_initial):
+    """Run `workers` uvicorn processes for the API and the AutoTrainer in its own process.
+
+    Workers pick up newly trained models through the model registry (latest
+    ModelArtifact row / artifact mtime), not shared memory. uvicorn's
+    supervisor forwards SIGTERM/SIGINT to the workers; once it returns the
+    trainer process is stopped the same way. Ingest label counts reach the
+    trainer through a `LabelRelay` file named by LABEL_EVENTS_PATH.
+    """
+    fd, relay_path = tempfile.mkstemp(prefix="label-events-", suffix=".log")
+    os.close(fd)
+    ctx = multiprocessing.get_context("spawn")
+    trainer = ctx.Process(target=auto_trainer_process, args=(interval_min, threshold, train_mode, run_initial, relay_path),
+                          name="auto-trainer")
+    trainer.start()
+    # inherited by the uvicorn worker processes, whose label_events then write to the relay
+    os.environ["LABEL_EVENTS_PATH"] = relay_path
+    logger.info("AutoTrainer process started (pid %s), serving API with %d workers", trainer.pid, workers)
+    try:
+        uvicorn.run("backend.api:app", host=host, port=port, workers=workers, log_level="info", access_log=False)
+    finally:
+        if trainer.is_alive():
+            trainer.terminate()
+        trainer.join(timeout=30)
+        os.environ.pop("LABEL_EVENTS_PATH", None)
+        os.remove(relay_path)
+        logger.info("Exited")
+
+def main(bulk_csv=None, host='127.0.0.1', port=8000, interval_min=60, threshold=50, run_initial=False, train_mode="full", workers=1):
     init_db()
     if bulk_csv:
         try:
             bulk_load_csv_to_students(bulk_csv)
         except Exception as e:
             logger.exception("Bulk load failed: %s", e)
+    if workers > 1:
+        serve_multiprocess(host, port, workers, interval_min, threshold, train_mode, run_initial)
+        return
     api_thread = start_api_in_thread(host, port)
-    trainer = AutoTrainer(interval_min, threshold)
+    trainer = AutoTrainer(interval_min, threshold, train_mode)
     trainer.start()
     if run_initial:
-        db = SessionLocal()
-        try:
-            last = get_last_training_time(db)
-            labeled = count_labeled_since(db, last)
-            if labeled >= 10:
-                trigger_train({"test_size":0.2})
-        finally:
-            db.close()
+        run_initial_train()
     def _signal(sig, frame):
         logger.info("Shutting down...")
         try:
@@ -143,7 +247,10 @@ def main(bulk_csv=None, host='127.0.0.1', port=8000, interval_min=60, threshold=
         while True:
             time.sleep(1)
     except (KeyboardInterrupt, SystemExit):
+        pass
+    finally:
         trainer.stop()
+        training_executor.shutdown(wait=False)
         logger.info("Exited")
 
 if __name__ == "__main__":
@@ -153,4 +260,6 @@ if __name__ == "__main__":
     run_init = os.environ.get("RUN_INITIAL_TRAIN","0") == "1"
     host = os.environ.get("HOST","127.0.0.1")
     port = int(os.environ.get("PORT","8000"))
-    main(bulk_csv=bulk, host=host, port=port, interval_min=interval, threshold=threshold, run_initial=run_init)
+    train_mode = os.environ.get("AUTO_TRAIN_MODE","full")
+    workers = int(os.environ.get("API_WORKERS","1"))
+    main(bulk_csv=bulk, host=host, port=port, interval_min=interval, threshold=threshold, run_initial=run_init, train_mode=train_mode, workers=workers)
@@ -1,14 +1,21 @@
 import pandas as pd
 import joblib
 import os
+import sys
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))  # src folder
-MODEL_PATH = os.path.join(BASE_DIR, "../models/dropout_model.pkl")
+MODEL_PATH = os.environ.get("MODEL_PATH", os.path.join(BASE_DIR, "../models/dropout_model.pkl"))
 INPUT_CSV = os.path.join(BASE_DIR, "../data/new_students.csv")
 OUTPUT_CSV = os.path.join(BASE_DIR, "../data/predicted_students.csv")
 
 # LIOAD
-model = joblib.load(MODEL_PATH)
+# numpy arrays in an uncompressed joblib dump are memory-mapped instead of copied
+model = joblib.load(MODEL_PATH, mmap_mode="r")
+
+# --compiled (or INFERENCE_BACKEND=compiled): preprocessor in sklearn, trees from flat node arrays
+if "--compiled" in sys.argv or os.environ.get("INFERENCE_BACKEND") == "compiled":
+    from backend.compiled import compile_pipeline
+    model = compile_pipeline(model) or model
 
 # LAOD INOUT SET
 new_students = pd.read_csv(INPUT_CSV)
@@ -2,6 +2,7 @@
 import requests
 import random
 import json
+import argparse
 API = "http://127.0.0.1:8000"
 def random_student(i):
     return {
@@ -16,9 +17,13 @@ def random_student(i):
         "previous_failures": random.randint(0,3),
         "drop_out": random.choice([0,1]) if random.random() < 0.3 else None
     }
-def main(n=50):
-    batch = {"students":[random_student(i) for i in range(1000,1000+n)]}
+def main(n=50, start_id=1000):
+    batch = {"students":[random_student(i) for i in range(start_id,start_id+n)]}
     res = requests.post(API + "/ingest/students", json=batch)
     print(res.status_code, res.text)
 if __name__ == "__main__":
-    main(100)
+    parser = argparse.ArgumentParser(description="POST random students to /ingest/students")
+    parser.add_argument("-n", type=int, default=100)
+    parser.add_argument("--start-id", type=int, default=1000, help="first student_id (use a new offset to insert instead of update)")
+    args = parser.parse_args()
+    main(args.n, args.start_id)
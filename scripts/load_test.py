@@ -0,0 +1,139 @@
+# Asyncio load generator for /ingest/students and /predict
+#
+#   python scripts/load_test.py --rps 200 --concurrency 32 --duration 60 --mix ingest=0.2,predict=0.8 --batch-sizes 1,1,1,10,100
+#
+# Requests are issued open-loop at --rps (not "as fast as responses come back"), so a slow server shows up as
+# latency and as requests dropped at the client when all --concurrency slots are busy.
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from generate_dummy import iter_dummy_chunks
+
+PATHS = {"ingest": "/ingest/students", "predict": "/predict"}
+
+def _parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name not in PATHS:
+            raise SystemExit(f"unknown endpoint in --mix: {name} (choose from {', '.join(PATHS)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+def _percentiles(samples):
+    if not samples:
+        return {}
+    s = sorted(samples)
+    pick = lambda q: round(s[min(len(s) - 1, int(q * len(s)))] * 1000, 3)
+    return {"p50_ms": pick(0.50), "p95_ms": pick(0.95), "p99_ms": pick(0.99), "max_ms": round(s[-1] * 1000, 3)}
+
+class Stats:
+    def __init__(self):
+        self.latencies, self.requests, self.rows, self.errors, self.status = [], 0, 0, 0, {}
+
+    def record(self, latency, rows, status):
+        self.requests += 1
+        self.status[status] = self.status.get(status, 0) + 1
+        if status == 200:
+            self.latencies.append(latency)
+            self.rows += rows
+        else:
+            self.errors += 1
+
+    def report(self, elapsed):
+        return {
+            "requests": self.requests, "rps": round(self.requests / elapsed, 1), "rows_per_sec": round(self.rows / elapsed, 1),
+            "errors": self.errors, "error_rate": round(self.errors / self.requests, 4) if self.requests else 0.0,
+            "status": {str(k): v for k, v in sorted(self.status.items(), key=str)}, **_percentiles(self.latencies),
+        }
+
+def _student_pool(size, seed):
+    df = next(iter_dummy_chunks(size, chunk_size=size, seed=seed, labelled_fraction=0.5))
+    return df.astype(object).where(df.notna(), None).to_dict("records")
+
+async def run(args):
+    mix = _parse_mix(args.mix)
+    batch_sizes = [int(b) for b in args.batch_sizes.split(",")]
+    rnd = random.Random(args.seed)
+    pool = _student_pool(args.pool_size, args.seed)
+    next_id = [args.start_id]
+    stats = {name: Stats() for name in mix}
+    dropped = {name: 0 for name in mix}
+    slots = asyncio.Semaphore(args.concurrency)
+
+    def payload(kind, size):
+        rows = [pool[rnd.randrange(len(pool))] for _ in range(size)]
+        if kind == "ingest":
+            # fresh ids so ingest keeps inserting; --start-id keeps separate runs apart
+            rows = [dict(r, student_id=next_id[0] + i) for i, r in enumerate(rows)]
+            next_id[0] += size
+        else:
+            rows = [dict(r, drop_out=None) for r in rows]
+        return {"students": rows}
+
+    async def send(client, kind, body, size):
+        t0 = time.perf_counter()
+        try:
+            status = (await client.post(PATHS[kind], json=body)).status_code
+        except httpx.HTTPError as e:
+            status = type(e).__name__
+        finally:
+            slots.release()
+        stats[kind].record(time.perf_counter() - t0, size, status)
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.api, timeout=args.timeout, limits=limits) as client:
+        tasks, kinds, weights = set(), list(mix), list(mix.values())
+        started = time.perf_counter()
+        total = int(args.rps * args.duration)
+        for i in range(total):
+            # open loop: request i is due at started + i / rps regardless of how earlier ones are doing
+            delay = started + i / args.rps - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            kind = rnd.choices(kinds, weights)[0]
+            if slots.locked():
+                dropped[kind] += 1
+                continue
+            await slots.acquire()
+            size = rnd.choice(batch_sizes)
+            task = asyncio.create_task(send(client, kind, payload(kind, size), size))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.wait(tasks)
+        elapsed = time.perf_counter() - started
+    return {
+        "target_rps": args.rps, "concurrency": args.concurrency, "duration_s": round(elapsed, 2),
+        "endpoints": {k: dict(s.report(elapsed), dropped=dropped[k]) for k, s in stats.items()},
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Concurrent load test for /ingest/students and /predict")
+    parser.add_argument("--api", default=os.environ.get("API", "http://127.0.0.1:8000"))
+    parser.add_argument("--rps", type=float, default=50, help="target requests per second (all endpoints)")
+    parser.add_argument("--concurrency", type=int, default=16, help="max requests in flight")
+    parser.add_argument("--duration", type=float, default=30, help="seconds")
+    parser.add_argument("--mix", default="ingest=0.2,predict=0.8", help="endpoint weights")
+    parser.add_argument("--batch-sizes", default="1,1,1,10,100", help="students per request, sampled uniformly")
+    parser.add_argument("--start-id", type=int, default=10_000_000, help="first student_id used by ingest requests")
+    parser.add_argument("--pool-size", type=int, default=10_000, help="synthetic students to sample payloads from")
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default=None, help="also write the report to this JSON file")
+    args = parser.parse_args(argv)
+    report = asyncio.run(run(args))
+    print(json.dumps(report, indent=2))
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,10 @@
+import os
+import sys
+import tempfile
+
+# backend modules read their configuration at import time, so point them at a scratch DB/model dir first
+_tmp = tempfile.mkdtemp(prefix="dropout-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_tmp}/test.db")
+os.environ.setdefault("MODEL_DIR", os.path.join(_tmp, "models"))
+os.environ.setdefault("MODEL_REGISTRY_CHECK_SECONDS", "0")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,56 @@
+import joblib
+from sqlalchemy import text
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+from generate_dummy import generate_dummy_data
+from backend import artifacts, models
+from backend.artifacts import latest_artifact, save_artifact
+from backend.database import Base, SessionLocal, engine
+from backend.features import FeatureEncoder
+
+def test_other_writers_are_not_blocked_while_the_artifact_is_written(tmp_path, monkeypatch):
+    Base.metadata.create_all(bind=engine)
+    df = generate_dummy_data(200)
+    encoder = FeatureEncoder().fit(df)
+    pipeline = Pipeline([("clf", LogisticRegression(max_iter=1000))]).fit(encoder.transform(df), df["drop_out"])
+    seen, real_dump = {}, joblib.dump
+    db = SessionLocal()
+    db.query(models.Student).filter(models.Student.student_id == 990_001).delete()
+    db.commit()
+    db.close()
+
+    def dump_while_ingesting(obj, path):
+        # stands in for a slow dump of a large forest: ingest has to be able to commit meanwhile
+        db = SessionLocal()
+        try:
+            db.execute(text("PRAGMA busy_timeout = 100"))
+            db.add(models.Student(student_id=990_001, age=18))
+            db.commit()
+            seen["unfinished"] = latest_artifact("slow-model")
+        finally:
+            db.close()
+        real_dump(obj, path)
+
+    monkeypatch.setattr(artifacts.joblib, "dump", dump_while_ingesting)
+    artifact_id, path = save_artifact(pipeline, encoder, "slow-model", model_dir=str(tmp_path))
+    assert seen["unfinished"] is None
+    assert latest_artifact("slow-model").id == artifact_id
+
+def test_failed_write_discards_the_reserved_row(tmp_path, monkeypatch):
+    import pytest
+    Base.metadata.create_all(bind=engine)
+    df = generate_dummy_data(200)
+    encoder = FeatureEncoder().fit(df)
+    pipeline = Pipeline([("clf", LogisticRegression(max_iter=1000))]).fit(encoder.transform(df), df["drop_out"])
+
+    def failing_dump(obj, path):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(artifacts.joblib, "dump", failing_dump)
+    with pytest.raises(OSError):
+        save_artifact(pipeline, encoder, "failing-model", model_dir=str(tmp_path))
+    db = SessionLocal()
+    try:
+        assert db.query(models.ModelArtifact).filter(models.ModelArtifact.name == "failing-model").count() == 0
+    finally:
+        db.close()
@@ -0,0 +1,56 @@
+import pytest
+from backend import batch_score
+
+def test_scores_with_the_configured_model_name(monkeypatch):
+    asked = []
+    monkeypatch.setattr(batch_score, "latest_model_artifact", lambda name=None: asked.append(name))
+    monkeypatch.setenv("MODEL_NAME", "other-model")
+    with pytest.raises(FileNotFoundError):
+        batch_score.score_students()
+    with pytest.raises(FileNotFoundError):
+        batch_score.score_students(model_name="explicit")
+    assert asked == ["other-model", "explicit"]
+
+def test_anonymous_students_keep_integer_ids(tmp_path):
+    import joblib
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import Pipeline
+    from generate_dummy import generate_dummy_data
+    from backend import models
+    from backend.database import Base, SessionLocal, engine
+    from backend.features import FeatureEncoder
+    from backend.ingest import upsert_students
+
+    df = generate_dummy_data(200)
+    encoder = FeatureEncoder().fit(df)
+    pipeline = Pipeline([("clf", LogisticRegression(max_iter=1000))]).fit(encoder.transform(df), df["drop_out"])
+    path = str(tmp_path / "dropout_model.pkl")
+    joblib.dump((pipeline, encoder.feature_names), path)
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        for table in (models.Prediction, models.LatestPrediction, models.Student):
+            db.query(table).delete()
+        records = df.head(5).astype(object).to_dict("records")
+        records[1]["student_id"] = records[3]["student_id"] = None
+        upsert_students(db, records)
+        db.commit()
+    finally:
+        db.close()
+
+    stats = batch_score.score_students(workers=1, model_path=path)
+
+    db = SessionLocal()
+    try:
+        assert stats["rows"] == 5
+        raw_ids = sorted((p.raw_student_id for p in db.query(models.Prediction)), key=lambda v: (v is None, v))
+        assert raw_ids == [1, 3, 5, None, None]
+        assert all(isinstance(v, int) for v in raw_ids[:3])
+        assert sorted(r.raw_student_id for r in db.query(models.LatestPrediction)) == [1, 3, 5]
+    finally:
+        db.close()
+    # what the worker hands back must bind to an INTEGER column on any backend, not just SQLite
+    batch_score._init_worker(path, None)
+    (_, sids, _, _), = batch_score._score_partition((0, 10 ** 9), None, 100)
+    assert sids == [1, 3, 5, None, None] and all(type(v) is int for v in sids if v is not None)
@@ -0,0 +1,63 @@
+import io
+import json
+import joblib
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+from fastapi.testclient import TestClient
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+from generate_dummy import generate_dummy_data
+from backend import api
+from backend.features import FeatureEncoder
+from backend.registry import ModelRegistry
+
+@pytest.fixture
+def legacy_registry(tmp_path, monkeypatch):
+    # a pre-artifact `(pipeline, feature_names)` pickle served from MODEL_PATH: no ModelArtifact id
+    df = generate_dummy_data(500)
+    encoder = FeatureEncoder().fit(df)
+    pipeline = Pipeline([("clf", LogisticRegression(max_iter=1000))]).fit(encoder.transform(df), df["drop_out"])
+    path = tmp_path / "dropout_model.pkl"
+    joblib.dump((pipeline, encoder.feature_names), path)
+    registry = ModelRegistry(model_name="no-such-model", legacy_path=str(path), check_interval=0)
+    monkeypatch.setattr(api, "registry", registry)
+    return registry
+
+@pytest.mark.parametrize("fmt", ["ndjson", "arrow", "parquet"])
+def test_bulk_predict_legacy_model(legacy_registry, fmt):
+    students = generate_dummy_data(1200).drop(columns=["drop_out"])
+    if fmt == "ndjson":
+        body = students.to_json(orient="records", lines=True).encode()
+    else:
+        table = pa.Table.from_pandas(students, preserve_index=False)
+        sink = io.BytesIO()
+        if fmt == "arrow":
+            with pa.ipc.new_stream(sink, table.schema) as w:
+                w.write_table(table)
+        else:
+            pq.write_table(table, sink)
+        body = sink.getvalue()
+    r = TestClient(api.app).post(f"/predict/bulk?format={fmt}&chunksize=500&persist=false", content=body)
+    assert r.status_code == 200
+    if fmt == "ndjson":
+        rows = [json.loads(line) for line in r.text.splitlines()]
+        assert len(rows) == 1200 and all(row["model_id"] is None and row["error"] is None for row in rows)
+    else:
+        out = (pa.ipc.open_stream(r.content).read_all() if fmt == "arrow" else pq.read_table(io.BytesIO(r.content))).to_pandas()
+        assert len(out) == 1200 and out["model_id"].isna().all() and out["error"].isna().all()
+
+@pytest.mark.parametrize("bad_row", [3, 250])
+def test_bulk_predict_reports_malformed_ndjson_lines_per_row(legacy_registry, bad_row):
+    students = generate_dummy_data(300).drop(columns=["drop_out"])
+    lines = students.to_json(orient="records", lines=True).strip().split("\n")
+    lines[bad_row] = '{"student_id": 7, "age": '
+    lines.insert(bad_row + 1, "[1, 2]")
+    r = TestClient(api.app).post("/predict/bulk?format=ndjson&chunksize=100&persist=false",
+                                 content="\n".join(lines).encode())
+    assert r.status_code == 200
+    rows = [json.loads(line) for line in r.text.splitlines()]
+    assert len(rows) == 301
+    assert [i for i, row in enumerate(rows) if row["error"]] == [bad_row, bad_row + 1]
+    assert rows[bad_row]["error"] == "invalid JSON" and rows[bad_row]["student_id"] is None
+    assert rows[bad_row + 2]["student_id"] == int(students["student_id"].iloc[bad_row + 1])
@@ -0,0 +1,31 @@
+import os
+import joblib
+from backend.cache import PredictionCache
+from backend.database import Base, engine
+from backend.registry import ModelRegistry
+
+STUDENT = {"student_id": 1, "age": 18, "gender": "Male", "attendance_percentage": 90.0, "gpa": 7.5,
+           "parent_education": "Graduate", "socioeconomic_status": "Medium",
+           "extracurricular_participation": 2, "previous_failures": 0}
+
+def test_legacy_model_reload_evicts_cached_results(tmp_path):
+    # the registry asks the models table for an artifact before falling back to the legacy file
+    Base.metadata.create_all(bind=engine)
+    path = str(tmp_path / "dropout_model.pkl")
+    joblib.dump(("model-v1", ["age"]), path)
+    registry = ModelRegistry(model_name="no-such-model", legacy_path=path, check_interval=0)
+    cache = PredictionCache(max_entries=10, ttl_seconds=600)
+    registry.add_listener(cache.on_model_change)
+
+    first = registry.get()
+    assert first.model_id is None
+    cache.put(first.version, STUDENT, 1, 0.9)
+    assert cache.get(first.version, STUDENT) == (1, 0.9)
+
+    # retrain in place: same (absent) model id, new file
+    joblib.dump(("model-v2", ["age"]), path)
+    os.utime(path, (os.path.getmtime(path) + 10,) * 2)
+    second = registry.get()
+    assert second.model == "model-v2" and second.model_id is None
+    assert cache.get(second.version, STUDENT) is None
+    assert len(cache._data) == 0
@@ -0,0 +1,30 @@
+import os
+import joblib
+import numpy as np
+from sklearn.ensemble import GradientBoostingClassifier
+from generate_dummy import generate_dummy_data
+from backend.compiled import CompiledForest, compile_forest, compile_pipeline
+from backend.features import FeatureEncoder
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_shipped_random_forest_matches_predict_proba():
+    pipeline = joblib.load(os.path.join(ROOT, "dropout_model.pkl"))
+    X = generate_dummy_data(3000, seed=7)[list(pipeline.feature_names_in_)]
+    compiled = compile_pipeline(pipeline)
+    assert compiled is not None
+    np.testing.assert_array_equal(compiled.predict_proba(X), pipeline.predict_proba(X))
+    np.testing.assert_array_equal(compiled.predict(X), pipeline.predict(X))
+
+def test_gradient_boosting_matches_predict_proba():
+    df = generate_dummy_data(3000)
+    encoder = FeatureEncoder().fit(df)
+    X = encoder.transform(df)
+    clf = GradientBoostingClassifier(n_estimators=50, max_depth=3, random_state=42).fit(X, df["drop_out"])
+    forest = compile_forest(clf)
+    X_new = encoder.transform(generate_dummy_data(2000, seed=7))
+    np.testing.assert_allclose(forest.predict_proba(X_new), clf.predict_proba(X_new), rtol=0, atol=1e-12)
+    np.testing.assert_array_equal(forest.predict(X_new), clf.predict(X_new))
+    # the flat arrays round-trip through the artifact sidecar format
+    again = CompiledForest.from_dict(forest.to_dict())
+    np.testing.assert_array_equal(again.predict_proba(X_new), forest.predict_proba(X_new))
@@ -0,0 +1,49 @@
+from backend import models
+from backend.database import Base, SessionLocal, engine
+from backend.events import LabelEvents, LabelRelay
+from backend.ingest import upsert_students
+
+def _student(sid, drop_out):
+    return {"student_id": sid, "age": 18, "gender": "Female", "attendance_percentage": 80.0, "gpa": 6.0,
+            "parent_education": "Graduate", "socioeconomic_status": "Low", "extracurricular_participation": 1,
+            "previous_failures": 0, "drop_out": drop_out}
+
+def test_only_changed_labels_are_counted():
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        db.query(models.Student).filter(models.Student.student_id.between(900_001, 900_004)).delete()
+        first = upsert_students(db, [_student(900_001, 1), _student(900_002, 0), _student(900_003, None)])
+        db.commit()
+        assert first["labels_changed"] == 2
+        # re-sent unchanged labels and a still-unlabelled row are not new training data
+        again = upsert_students(db, [_student(900_001, 1), _student(900_002, 0), _student(900_003, None)])
+        db.commit()
+        assert again["labels_changed"] == 0
+        changed = upsert_students(db, [_student(900_001, 0), _student(900_003, 1), _student(900_004, 1)])
+        db.commit()
+        assert changed["labels_changed"] == 3
+    finally:
+        db.close()
+
+def test_relay_carries_counts_between_event_buses(tmp_path):
+    path = str(tmp_path / "label-events.log")
+    worker = LabelEvents(LabelRelay(path))
+    trainer, seen = LabelEvents(), []
+    trainer.subscribe(seen.append)
+    relay = LabelRelay(path)
+
+    worker.publish(3)
+    worker.publish(0)
+    worker.publish(4)
+    assert worker.pending == 0
+    trainer.publish(relay.receive())
+    assert seen == [7] and trainer.pending == 7
+
+    # a partially written line waits for the next poll
+    with open(path, "a") as f:
+        f.write("1")
+    assert relay.receive() == 0
+    with open(path, "a") as f:
+        f.write("0\n")
+    assert relay.receive() == 10
@@ -0,0 +1,21 @@
+import numpy as np
+from generate_dummy import generate_dummy_data
+from backend.features import FeatureEncoder
+
+def test_single_row_encodes_like_its_row_in_the_batch():
+    df = generate_dummy_data(200)
+    encoder = FeatureEncoder().fit(df)
+    X = encoder.transform(df)
+    for i in (0, 57, 199):
+        np.testing.assert_array_equal(encoder.transform(df.iloc[[i]]), X[[i]])
+        np.testing.assert_array_equal(encoder.transform([df.iloc[i].to_dict()]), X[[i]])
+
+def test_unseen_category_encodes_as_all_zeros():
+    df = generate_dummy_data(200)
+    encoder = FeatureEncoder().fit(df)
+    row = df.iloc[[0]].assign(gender="Unknown", parent_education=None)
+    X = encoder.transform(row)
+    assert X.shape == (1, len(encoder.feature_names))
+    for col in ("gender", "parent_education"):
+        dummies = [j for j, name in enumerate(encoder.feature_names) if name.startswith(col + "_")]
+        assert dummies and not X[0, dummies].any()
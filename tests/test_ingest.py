@@ -0,0 +1,28 @@
+import pytest
+from backend import ingest, models
+from backend.database import Base, SessionLocal, engine
+from backend.ingest import upsert_students
+
+@pytest.mark.parametrize("upsert", ["on_conflict", "insert_update"])
+def test_inserted_and_updated_counts(upsert, monkeypatch):
+    if upsert == "insert_update":
+        # the dialect-neutral INSERT + UPDATE path used off SQLite/Postgres
+        monkeypatch.setattr(ingest, "_dialect_insert", lambda dialect: None)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        db.query(models.Student).filter(models.Student.student_id.between(920_001, 920_003)).delete()
+        db.commit()
+        first = upsert_students(db, [{"student_id": 920_001, "age": 17}, {"student_id": 920_002, "age": 18}])
+        db.commit()
+        assert (first["inserted"], first["updated"]) == (2, 0)
+        # a repeated id within one batch is one row; anonymous rows are always inserted
+        second = upsert_students(db, [{"student_id": 920_002, "age": 19}, {"student_id": 920_003, "age": 20},
+                                      {"student_id": 920_003, "gpa": 7.0}, {"student_id": None, "age": 21}])
+        db.commit()
+        assert (second["inserted"], second["updated"]) == (2, 1)
+        stored = dict(db.query(models.Student.student_id, models.Student.age)
+                      .filter(models.Student.student_id.between(920_001, 920_003)).all())
+        assert stored == {920_001: 17, 920_002: 19, 920_003: 20}
+    finally:
+        db.close()
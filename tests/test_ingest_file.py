@@ -0,0 +1,52 @@
+import asyncio
+import os
+import tempfile
+import pytest
+from fastapi.testclient import TestClient
+from starlette.requests import ClientDisconnect
+from backend import api, importer
+from backend.api import app
+from backend.database import Base, engine
+
+@pytest.mark.parametrize("fmt, body", [
+    ("csv", b'student_id,age\n1,17\n"unterminated\n'),
+    ("csv", b"\xff\xfe\x00not utf-8"),
+    ("csv", b""),
+    ("parquet", b"not a parquet file"),
+    ("arrow", b"not an arrow stream"),
+])
+def test_malformed_upload_is_a_client_error(fmt, body):
+    Base.metadata.create_all(bind=engine)
+    r = TestClient(app).post(f"/ingest/file?format={fmt}", content=body)
+    assert r.status_code == 400
+    assert r.json()["detail"]
+
+@pytest.mark.parametrize("path", ["/ingest/file?format=csv", "/predict/bulk?format=ndjson"])
+def test_client_disconnect_mid_upload_removes_the_spool(path, tmp_path, monkeypatch):
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    monkeypatch.setattr(api.registry, "get", lambda: object())
+    messages = iter([{"type": "http.request", "body": b"student_id,age\n1,17\n", "more_body": True},
+                     {"type": "http.disconnect"}])
+    async def receive():
+        return next(messages)
+    async def send(message):
+        pass
+    route, _, query = path.partition("?")
+    scope = {"type": "http", "method": "POST", "path": route, "query_string": query.encode(), "headers": [],
+             "http_version": "1.1", "scheme": "http", "server": ("test", 80), "client": ("test", 1), "root_path": ""}
+    with pytest.raises(ClientDisconnect):
+        asyncio.run(api.app(scope, receive, send))
+    assert os.listdir(tmp_path) == []
+
+def test_checkpoint_for_a_replaced_file_is_ignored(tmp_path):
+    Base.metadata.create_all(bind=engine)
+    path, checkpoint = tmp_path / "students.csv", str(tmp_path / "import.ckpt")
+    path.write_text("student_id,age\n" + "".join(f"{910000 + i},17\n" for i in range(4)))
+    importer._write_checkpoint(checkpoint, str(path), 2)
+    assert importer._read_checkpoint(checkpoint, str(path)) == 2
+    # a new export under the same name: the old offset would silently skip its first rows
+    path.write_text("student_id,age\n" + "".join(f"{910100 + i},18\n" for i in range(5)))
+    assert importer._read_checkpoint(checkpoint, str(path)) == 0
+    stats = importer.import_file(str(path), chunksize=2, checkpoint_path=checkpoint)
+    assert stats["start_offset"] == 0 and stats["rows"] == 5
+    assert not os.path.exists(checkpoint)
@@ -0,0 +1,30 @@
+import threading
+from backend.predictions import PredictionWriter, dropped_predictions
+
+def test_non_blocking_submit_drops_when_queue_is_full():
+    writer = PredictionWriter(max_queue=1)
+    # park the writer thread so nothing drains the queue
+    release = threading.Event()
+    writer._thread = threading.Thread(target=release.wait, daemon=True)
+    writer._thread.start()
+    before = dropped_predictions.value()
+    assert writer.submit([{"raw_student_id": 1}], block=False)
+    assert not writer.submit([{"raw_student_id": 2}, {"raw_student_id": 3}], block=False)
+    assert dropped_predictions.value() - before == 2
+    release.set()
+
+def test_latest_predictions_skip_rows_without_a_student_id():
+    from backend import models
+    from backend.database import Base, SessionLocal, engine
+    from backend.predictions import upsert_latest_predictions
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        db.query(models.LatestPrediction).delete()
+        rows = [{"raw_student_id": sid, "student_id": None, "predicted_label": 1, "probability": 0.9, "model_id": None}
+                for sid in (float("nan"), None, 7)]
+        upsert_latest_predictions(db, rows)
+        db.commit()
+        assert [r.raw_student_id for r in db.query(models.LatestPrediction)] == [7]
+    finally:
+        db.close()
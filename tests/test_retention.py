@@ -0,0 +1,30 @@
+from datetime import datetime, timezone
+from sqlalchemy import text
+from backend import models
+from backend.database import Base, SessionLocal, engine
+from backend.retention import compact_predictions
+
+def test_compaction_includes_rows_stamped_at_midnight():
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        db.query(models.Prediction).delete()
+        db.query(models.PredictionDailyAggregate).delete()
+        # the format SQLite's CURRENT_TIMESTAMP server default writes
+        for stamp, label in [("2026-01-01 00:00:00", 1), ("2026-01-01 12:30:00", 0), ("2026-01-02 00:00:00", 1)]:
+            db.execute(text("INSERT INTO predictions (raw_student_id, predicted_label, probability, created_at) "
+                            "VALUES (1, :label, 0.5, :stamp)"), {"label": label, "stamp": stamp})
+        db.commit()
+    finally:
+        db.close()
+
+    stats = compact_predictions(retention_days=30, now=datetime(2026, 6, 1, tzinfo=timezone.utc))
+
+    db = SessionLocal()
+    try:
+        assert stats["rows"] == 3 and stats["days"] == 2
+        assert db.query(models.Prediction).count() == 0
+        aggs = {a.day.isoformat(): (a.n, a.positives) for a in db.query(models.PredictionDailyAggregate)}
+        assert aggs == {"2026-01-01": (2, 1), "2026-01-02": (1, 1)}
+    finally:
+        db.close()
@@ -0,0 +1,26 @@
+from datetime import datetime, timezone
+import main
+from backend import models
+from backend.database import Base, SessionLocal, engine
+from backend.train_model import last_training_run
+
+def test_last_run_is_looked_up_per_model_name():
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        runs = {}
+        for name, since in [("runs-a", 10), ("runs-b", 10 ** 9)]:
+            artifact = models.ModelArtifact(name=name, path=f"/nonexistent/{name}.joblib")
+            db.add(artifact)
+            db.flush()
+            runs[name] = models.TrainingRun(model_id=artifact.id, params={"last_student_id": since},
+                                            started_at=datetime.now(timezone.utc), finished_at=datetime.now(timezone.utc))
+            db.add(runs[name])
+        db.commit()
+        # runs-b trained last, but its high-water mark says nothing about runs-a
+        assert last_training_run("runs-a").id == runs["runs-a"].id
+        assert main.get_last_training_run(db, "runs-a").id == runs["runs-a"].id
+        assert main.count_new_labeled(db, "runs-a")[1] == 10
+        assert main.count_new_labeled(db, "runs-b")[1] == 10 ** 9
+    finally:
+        db.close()